@@ -1,11 +1,50 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 
 class BaseAgent(ABC):
+    # length of the flat genome vector evolved by flappy_population
+    GENOME_SIZE = 0
+    # standard deviation of the gaussian noise added by mutation
+    MUTATION_SCALE = 0.5
+    # same genome on the same course always earns the same fitness
+    DETERMINISTIC = True
+
+    def __init__(self, genome=None):
+        if genome is None:
+            genome = self.random_genomes(1, np.random.default_rng())[0]
+        self.genome = np.asarray(genome, dtype=float)
+
     @abstractmethod
     def predict_jump(self, horizontal_dist, vertical_dist):
         pass
 
+    @classmethod
+    def stack(cls, agents):
+        """Collects agents into the batch handed to predict_jump_batch"""
+        return list(agents)
+
+    @classmethod
+    def predict_jump_batch(
+        cls, batch, horizontal_dist, vertical_dist, velocity_y=None
+    ):
+        """Predicts a jump for every agent in a batch, taking and returning arrays
+
+        Falls back to one predict_jump call per agent, subclasses override it
+        (and stack) with a vectorized version that may also use velocity_y.
+        """
+        return np.fromiter(
+            (
+                agent.predict_jump(horizontal, vertical)
+                for agent, horizontal, vertical in zip(
+                    batch, horizontal_dist, vertical_dist
+                )
+            ),
+            dtype=bool,
+            count=len(batch),
+        )
+
     @abstractmethod
     def mutate(self):
         pass
@@ -14,3 +53,25 @@ class BaseAgent(ABC):
     @abstractmethod
     def breed(predictorA, predictorB):
         pass
+
+    @classmethod
+    def from_genome(cls, genome):
+        """Builds an agent around one genome row, without copying it"""
+        return cls(genome)
+
+    @classmethod
+    def random_genomes(cls, n, rng):
+        """Returns an (n, GENOME_SIZE) matrix of fresh genomes"""
+        return rng.normal(size=(n, cls.GENOME_SIZE))
+
+    @classmethod
+    def breed_batch(cls, genomesA, genomesB, rng):
+        """Uniform crossover of two parent matrices, one child per row"""
+        return np.where(rng.random(genomesA.shape) < 0.5, genomesA, genomesB)
+
+    @classmethod
+    def mutate_batch(cls, genomes, rng, rate, scale):
+        """Adds gaussian noise to a fraction rate of all genes, in place"""
+        mask = rng.random(genomes.shape) < rate
+        genomes[mask] += rng.normal(0, scale, np.count_nonzero(mask))
+        return genomes
@@ -0,0 +1,66 @@
+import numpy as np
+
+from .base import BaseAgent
+
+
+class NeuralAgent(BaseAgent):
+    """Feed-forward network on (horizontal, vertical, velocity) with one hidden layer
+
+    The genome is the flattened weights, laid out as the input weights, the
+    hidden biases, the output weights and the output bias.
+    """
+
+    N_INPUTS = 3
+    N_HIDDEN = 6
+    GENOME_SIZE = N_INPUTS * N_HIDDEN + N_HIDDEN + N_HIDDEN + 1
+    MUTATION_SCALE = 0.3
+    # brings distances in pixels and velocity into roughly [-1, 1]
+    INPUT_SCALE = np.array([1 / 288, 1 / 512, 1 / 10])
+
+    def predict_jump(self, horizontal_dist, vertical_dist, velocity_y=0):
+        jumps = self.predict_jump_batch(
+            self.stack([self]), [horizontal_dist], [vertical_dist], [velocity_y]
+        )
+        return bool(jumps[0])
+
+    @classmethod
+    def unpack(cls, genomes):
+        """Splits an (n, GENOME_SIZE) genome matrix into weight views"""
+        n = len(genomes)
+        i, h = cls.N_INPUTS, cls.N_HIDDEN
+        weights1 = genomes[:, : i * h].reshape(n, i, h)
+        bias1 = genomes[:, i * h : i * h + h]
+        weights2 = genomes[:, i * h + h : i * h + 2 * h]
+        bias2 = genomes[:, -1]
+        return weights1, bias1, weights2, bias2
+
+    @classmethod
+    def stack(cls, agents):
+        return cls.unpack(np.stack([agent.genome for agent in agents]))
+
+    @classmethod
+    def predict_jump_batch(
+        cls, batch, horizontal_dist, vertical_dist, velocity_y=None
+    ):
+        weights1, bias1, weights2, bias2 = batch
+        if velocity_y is None:
+            velocity_y = np.zeros(len(bias2))
+        inputs = np.stack([horizontal_dist, vertical_dist, velocity_y], axis=1)
+        inputs = inputs * cls.INPUT_SCALE
+
+        # one stacked matmul per layer for the whole batch
+        hidden = np.tanh(np.einsum("ni,nih->nh", inputs, weights1) + bias1)
+        output = np.einsum("nh,nh->n", hidden, weights2) + bias2
+        return output > 0
+
+    def mutate(self):
+        self.mutate_batch(
+            self.genome[None], np.random.default_rng(), 0.1, self.MUTATION_SCALE
+        )
+
+    @staticmethod
+    def breed(predictorA, predictorB):
+        genomes = NeuralAgent.breed_batch(
+            predictorA.genome[None], predictorB.genome[None], np.random.default_rng()
+        )
+        return NeuralAgent(genomes[0])
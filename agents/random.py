@@ -1,14 +1,49 @@
 import random
 
+import numpy as np
+
 from .base import BaseAgent
 
 
 class RandomAgent(BaseAgent):
+    # the only gene is the chance to jump on any frame
+    GENOME_SIZE = 1
+    MUTATION_SCALE = 0.02
+    DETERMINISTIC = False
+
+    def __init__(self, genome=None):
+        super().__init__([1 / 18] if genome is None else genome)
+
     def predict_jump(self, horizontal_dist, vertical_dist):
-        return random.randint(1, 18) == 1
+        return random.random() < self.genome[0]
+
+    @classmethod
+    def stack(cls, agents):
+        return np.array([agent.genome[0] for agent in agents])
+
+    @classmethod
+    def predict_jump_batch(
+        cls, batch, horizontal_dist, vertical_dist, velocity_y=None
+    ):
+        return np.random.random(len(batch)) < batch
 
     def mutate(self):
-        pass
+        self.genome = self.mutate_batch(
+            self.genome[None].copy(), np.random.default_rng(), 1, self.MUTATION_SCALE
+        )[0]
 
+    @staticmethod
     def breed(predictorA, predictorB):
-        pass
+        genomes = RandomAgent.breed_batch(
+            predictorA.genome[None], predictorB.genome[None], np.random.default_rng()
+        )
+        return RandomAgent(genomes[0])
+
+    @classmethod
+    def random_genomes(cls, n, rng):
+        return rng.uniform(0, 0.2, size=(n, cls.GENOME_SIZE))
+
+    @classmethod
+    def mutate_batch(cls, genomes, rng, rate, scale):
+        genomes = super().mutate_batch(genomes, rng, rate, scale)
+        return np.clip(genomes, 0, 1, out=genomes)
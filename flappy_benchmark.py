@@ -0,0 +1,191 @@
+"""
+Benchmarks simulation throughput, collision cost, startup time and parallel scaling
+
+Results are written as JSON, pass an earlier result file to --compare to see
+the ratio of every timing against it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import pygame
+
+from flappy_game import FlappyGame
+from flappy_parallel import ParallelEvaluator
+from flappy_population import Population
+from agents.neural import NeuralAgent
+
+parser = argparse.ArgumentParser(description="Benchmark flappy-genetic")
+parser.add_argument(
+    "--populations",
+    type=int,
+    nargs="+",
+    default=[1, 100, 1000, 10000],
+    help="population sizes to simulate",
+)
+parser.add_argument(
+    "--frames", type=int, default=1000, help="frame cap per simulated generation"
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    nargs="+",
+    default=None,
+    help="worker counts for parallel scaling, powers of two up to the core count",
+)
+parser.add_argument("--seed", type=int, default=0, help="seed for agents and course")
+parser.add_argument("--output", default=None, help="write the JSON results here")
+parser.add_argument("--compare", default=None, help="earlier results to compare to")
+
+
+def population(size, seed):
+    return Population(NeuralAgent, size, seed=seed).agents()
+
+
+def benchSimulation(sizes, frames, seed):
+    """frames/sec and bird-steps/sec of headless mainGame per population size"""
+    game = FlappyGame(headless=True, maxFrames=frames)
+    results = []
+    for size in sizes:
+        agents = population(size, seed)
+        start = time.perf_counter()
+        crashInfo = game.mainGame(game.movementInfo, agents, seed=seed)
+        elapsed = time.perf_counter() - start
+        birdSteps = int(np.floor(crashInfo["fitness"]).sum())
+        results.append(
+            {
+                "population": size,
+                "frames": crashInfo["frames"],
+                "seconds": elapsed,
+                "framesPerSec": crashInfo["frames"] / elapsed,
+                "birdStepsPerSec": birdSteps / elapsed,
+            }
+        )
+    return results
+
+
+def benchCollision(seed, birds=1000, repeat=200):
+    """per call cost of the single bird and batched crash checks"""
+    game = FlappyGame(headless=True)
+    rng = np.random.default_rng(seed)
+    pipeX = (game.PLAYERWIDTH + 20) * 2 + 10
+    # pipes overlapping the birds' columns, so no check is rejected for free
+    upperPipes = [{"x": 40.5, "y": -200}, {"x": 40.5 + pipeX, "y": -150}]
+    lowerPipes = [{"x": 40.5, "y": 220}, {"x": 40.5 + pipeX, "y": 270}]
+    playerx = int(game.SCREENWIDTH * 0.2)
+    playery = rng.uniform(0, game.BASEY - game.PLAYERHEIGHT, birds)
+
+    player = {"x": playerx, "y": float(playery[0]), "index": 0}
+    single = timeit.timeit(
+        lambda: game.checkCrash(dict(player), upperPipes, lowerPipes), number=repeat
+    )
+    batched = timeit.timeit(
+        lambda: game.checkCrashBatch(playerx, playery, 0, upperPipes, lowerPipes),
+        number=repeat,
+    )
+
+    playerMask, pipeMask = game.HITMASKS["player"][0], game.HITMASKS["pipe"][1]
+    playerRect = pygame.Rect(playerx, 200, game.PLAYERWIDTH, game.PLAYERHEIGHT)
+    pipeRect = pygame.Rect(playerx - 10, 210, game.PIPEWIDTH, game.PIPEHEIGHT)
+    pixel = timeit.timeit(
+        lambda: game.pixelCollision(playerRect, pipeRect, playerMask, pipeMask),
+        number=repeat,
+    )
+    return {
+        "checkCrashSec": single / repeat,
+        "checkCrashBatchPerBirdSec": batched / repeat / birds,
+        "pixelCollisionSec": pixel / repeat,
+    }
+
+
+def benchStartup(repeat=20):
+    """FlappyGame.__init__ time, headless with a cold and warm hitmask cache"""
+    with tempfile.TemporaryDirectory() as tmpDir:
+        cachePath = os.path.join(tmpDir, "hitmasks.npz")
+        start = time.perf_counter()
+        FlappyGame(headless=True, hitmaskCache=cachePath)
+        cold = time.perf_counter() - start
+        warm = timeit.timeit(
+            lambda: FlappyGame(headless=True, hitmaskCache=cachePath), number=repeat
+        )
+    return {"headlessColdSec": cold, "headlessWarmSec": warm / repeat}
+
+
+def benchParallel(workerCounts, size, frames, seed):
+    """wall time of one evaluation per worker count and the scaling efficiency"""
+    agents = population(size, seed)
+    results = []
+    for workers in workerCounts:
+        with ParallelEvaluator(workers, maxFrames=frames) as evaluator:
+            # warm up, so pool start and worker init are not measured
+            evaluator.evaluate(agents[:workers], seed=seed)
+            start = time.perf_counter()
+            evaluator.evaluate(agents, seed=seed)
+            elapsed = time.perf_counter() - start
+        speedup = results[0]["seconds"] / elapsed if results else 1.0
+        results.append(
+            {
+                "workers": workers,
+                "seconds": elapsed,
+                "speedup": speedup,
+                "efficiency": speedup * workerCounts[0] / workers,
+            }
+        )
+    return results
+
+
+def compare(results, baseline, path=""):
+    """prints current / baseline for every timing found in both results"""
+    if isinstance(results, dict):
+        for key, value in results.items():
+            if key in baseline:
+                compare(value, baseline[key], path + "." + key)
+    elif isinstance(results, list):
+        for i, (value, old) in enumerate(zip(results, baseline)):
+            compare(value, old, "%s[%d]" % (path, i))
+    elif isinstance(results, float) and baseline:
+        print("%-60s %8.3fx" % (path.lstrip("."), results / baseline))
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    workerCounts = args.workers
+    if workerCounts is None:
+        workerCounts = [1]
+        while workerCounts[-1] * 2 <= os.cpu_count():
+            workerCounts.append(workerCounts[-1] * 2)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "frames": args.frames,
+            "seed": args.seed,
+        },
+        "startup": benchStartup(),
+        "collision": benchCollision(args.seed),
+        "simulation": benchSimulation(args.populations, args.frames, args.seed),
+        "parallel": benchParallel(
+            workerCounts, max(args.populations), args.frames, args.seed
+        ),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
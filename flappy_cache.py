@@ -0,0 +1,84 @@
+"""
+Fitness cache keyed by genome and pipe course, so unchanged agents are not replayed
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+
+
+class FitnessCache:
+    """bounded LRU map from (genome hash, course seed) to fitness
+
+    Fitness is only reusable when the agent is deterministic and the course
+    comes from a seed, everything else is always simulated. The tag names
+    the game configuration the stored values belong to, so a cache file
+    written under other rules is never mixed in.
+    """
+
+    def __init__(self, maxsize=100000, path=None, tag=""):
+        self.maxsize = maxsize
+        self.path = path
+        self.tag = tag
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                stored = pickle.load(f)
+            if stored["tag"] == tag:
+                self.entries.update(stored["entries"])
+                while len(self.entries) > maxsize:
+                    self.entries.popitem(last=False)
+
+    def key(self, agent, seed):
+        """returns the cache key of an agent on a course, None if uncacheable"""
+        if seed is None or not agent.DETERMINISTIC:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(type(agent).__name__.encode())
+        digest.update(agent.genome.tobytes())
+        return digest.digest(), seed
+
+    def get(self, key):
+        if key is None or key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, fitness):
+        if key is None:
+            return
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def evaluate(self, agents, seed, evaluate):
+        """returns the fitness of agents, simulating only the ones not cached
+
+        evaluate(agents, seed) must return the fitness list of the agents it
+        is given, e.g. ParallelEvaluator.evaluate.
+        """
+        keys = [self.key(agent, seed) for agent in agents]
+        fitness = [self.get(key) for key in keys]
+        missing = [i for i, value in enumerate(fitness) if value is None]
+
+        if missing:
+            results = evaluate([agents[i] for i in missing], seed)
+            for i, value in zip(missing, results):
+                fitness[i] = value
+                self.put(keys[i], value)
+        return fitness
+
+    def save(self):
+        """writes the cache to its path, atomically replacing an older file"""
+        if self.path is None:
+            return
+        tmpPath = self.path + ".tmp"
+        with open(tmpPath, "wb") as f:
+            pickle.dump({"tag": self.tag, "entries": self.entries}, f)
+        os.replace(tmpPath, self.path)
@@ -0,0 +1,89 @@
+"""
+Batched pixel perfect collisions between birds and pipes using row bitmasks
+"""
+
+import numpy as np
+
+
+class BitmaskCollider:
+    """tests many birds against pipes at once, matching FlappyGame.checkCrash"""
+
+    def __init__(self, playerHitmasks, pipeHitmasks, baseY):
+        self.baseY = baseY
+        self.playerW, self.playerH = np.shape(playerHitmasks[0])
+        self.pipeW, self.pipeH = np.shape(pipeHitmasks[0])
+        # every row packed into one integer, bit x set where column x is solid
+        self.playerBits = np.stack([self.rowBits(mask) for mask in playerHitmasks])
+        self.pipeBits = np.stack([self.rowBits(mask) for mask in pipeHitmasks])
+        self.rows = np.arange(self.playerH)
+
+    @staticmethod
+    def rowBits(hitmask):
+        """packs a [x][y] hitmask into one uint64 per row"""
+        mask = np.asarray(hitmask, dtype=bool)
+        if mask.shape[0] > 64:
+            raise ValueError("hitmasks wider than 64 pixels can not be packed")
+        weights = np.left_shift(np.uint64(1), np.arange(mask.shape[0], dtype=np.uint64))
+        return np.bitwise_or.reduce(np.where(mask.T, weights, np.uint64(0)), axis=1)
+
+    def checkCrash(self, playerx, playery, playerIndex, pipeX, upperY, lowerY):
+        """returns crashed and groundCrash flags for every bird
+
+        playery holds one entry per bird, pipeX, upperY and lowerY one entry
+        per pipe pair, or one row per bird when birds fly different courses.
+        """
+        playery = np.asarray(playery, dtype=float)
+        # if player crashes into ground
+        groundCrash = playery + self.playerH >= self.baseY - 1
+        crashed = groundCrash.copy()
+
+        # pygame.Rect truncates its coordinates towards zero
+        px = int(playerx)
+        py = np.trunc(playery).astype(int)
+        pipeX = np.trunc(np.asarray(pipeX, dtype=float)).astype(int)
+        upperY = np.asarray(upperY, dtype=int)
+        lowerY = np.asarray(lowerY, dtype=int)
+        playerBits = self.playerBits[playerIndex]
+        perBird = pipeX.ndim == 2
+
+        for k in range(pipeX.shape[-1]):
+            qx = pipeX[..., k]
+            # cheap rejection of pipe pairs that are nowhere near the birds
+            xOverlap = (px < qx + self.pipeW) & (qx < px + self.playerW)
+            if not np.any(xOverlap):
+                continue
+
+            # gap interval rejection, only birds reaching into a pipe remain
+            uy, ly = upperY[..., k], lowerY[..., k]
+            inUpper = py < uy + self.pipeH
+            inLower = py + self.playerH > ly
+            candidates = np.flatnonzero(~crashed & xOverlap & (inUpper | inLower))
+            if not len(candidates):
+                continue
+
+            dx = px - (qx[candidates] if perBird else qx)
+            for pipeTop, pipeBits in ((uy, self.pipeBits[0]), (ly, self.pipeBits[1])):
+                qy = pipeTop[candidates] if perBird else pipeTop
+                hit = self.rowsCollide(
+                    dx, py[candidates] - qy, playerBits, pipeBits, self.pipeH
+                )
+                crashed[candidates[hit]] = True
+        return crashed, groundCrash
+
+    def rowsCollide(self, dx, dy, playerBits, pipeBits, pipeH):
+        """pixel tests birds offset by dx, dy from a pipe's top left corner"""
+        dx = np.broadcast_to(dx, np.shape(dy))
+        pipeRows = dy[:, None] + self.rows
+        valid = (pipeRows >= 0) & (pipeRows < pipeH)
+        pipeRowBits = np.where(
+            valid, pipeBits[np.clip(pipeRows, 0, pipeH - 1)], np.uint64(0)
+        )
+
+        # line both masks up on the pipe's columns, offsets stay below 64 bits
+        # because birds outside the pipe's columns never reach this test
+        shiftPlayer = np.maximum(dx, 0).astype(np.uint64)[:, None]
+        shiftPipe = np.maximum(-dx, 0).astype(np.uint64)[:, None]
+        overlap = np.left_shift(playerBits, shiftPlayer) & np.left_shift(
+            pipeRowBits, shiftPipe
+        )
+        return (overlap != 0).any(axis=1)
@@ -0,0 +1,102 @@
+"""
+Pipe courses generated up front as compact arrays of gap heights
+"""
+
+from multiprocessing import shared_memory
+import random
+
+import numpy as np
+
+
+class PipeCourse:
+    """the gap height of every pipe of a course, in the order they appear
+
+    A course is fully determined by its seed, so it can be regenerated or
+    extended anywhere. Gaps are read-only when the course is memory-mapped
+    from a file or attached from shared memory.
+    """
+
+    def __init__(self, seed, gapY, gapOffset, gapRange, sharedMemory=None):
+        self.seed = seed
+        self.gapY = gapY
+        self.gapOffset = gapOffset
+        self.gapRange = gapRange
+        # kept open while attached, so the array's buffer stays valid
+        self.sharedMemory = sharedMemory
+
+    @classmethod
+    def generate(cls, seed, length, gapOffset, gapRange):
+        """draws length gaps exactly like FlappyGame.getRandomPipe(Random(seed))"""
+        rng = random.Random(seed)
+        gapY = np.fromiter(
+            (rng.randrange(0, gapRange) + gapOffset for _ in range(length)),
+            dtype=np.int32,
+            count=length,
+        )
+        return cls(seed, gapY, gapOffset, gapRange)
+
+    def __len__(self):
+        return len(self.gapY)
+
+    def gap(self, index):
+        """returns the gap height of pipe index, extending the course if needed"""
+        if index >= len(self.gapY):
+            length = max(2 * len(self.gapY), index + 1)
+            extended = self.generate(self.seed, length, self.gapOffset, self.gapRange)
+            self.gapY = extended.gapY
+        return int(self.gapY[index])
+
+    def save(self, path):
+        """writes the gaps to an .npy file, together with what extends them"""
+        record = np.zeros(
+            (),
+            dtype=[
+                ("seed", "<i8"),
+                ("gapOffset", "<i4"),
+                ("gapRange", "<i4"),
+                ("gapY", "<i4", (len(self.gapY),)),
+            ],
+        )
+        record["seed"] = self.seed
+        record["gapOffset"] = self.gapOffset
+        record["gapRange"] = self.gapRange
+        record["gapY"] = self.gapY
+        np.save(path, record)
+
+    @classmethod
+    def load(cls, path):
+        """memory-maps a course written by save, read-only"""
+        record = np.load(path, mmap_mode="r")
+        return cls(
+            int(record["seed"]),
+            record["gapY"],
+            int(record["gapOffset"]),
+            int(record["gapRange"]),
+        )
+
+    def share(self):
+        """copies the gaps into a new shared memory block
+
+        Returns the block and a picklable handle for attach. The caller owns
+        the block and must close and unlink it once workers are done.
+        """
+        block = shared_memory.SharedMemory(create=True, size=max(self.gapY.nbytes, 1))
+        np.ndarray(self.gapY.shape, self.gapY.dtype, buffer=block.buf)[:] = self.gapY
+        handle = (block.name, len(self.gapY), self.seed, self.gapOffset, self.gapRange)
+        return block, handle
+
+    @classmethod
+    def attach(cls, handle):
+        """maps a course shared by share, read-only and without copying"""
+        name, length, seed, gapOffset, gapRange = handle
+        block = shared_memory.SharedMemory(name=name)
+        gapY = np.ndarray((length,), np.int32, buffer=block.buf)
+        gapY.flags.writeable = False
+        return cls(seed, gapY, gapOffset, gapRange, sharedMemory=block)
+
+    def close(self):
+        """releases an attached shared memory block"""
+        if self.sharedMemory is not None:
+            self.gapY = np.array(self.gapY)
+            self.sharedMemory.close()
+            self.sharedMemory = None
@@ -0,0 +1,196 @@
+"""
+Vectorized environment over the game rules, stepped by an external trainer
+"""
+
+import numpy as np
+
+from flappy_sim import PopulationSim
+
+
+class FlappyVecEnv:
+    """N independent games of one bird each, stepped together with NumPy
+
+    Every environment flies its own pipe course and starts a new episode on
+    a fresh course as soon as its bird crashes or reaches a limit of the
+    game, MAXFRAMES or MAXSCORE. Observations hold the horizontal and
+    vertical distance to the next gap and the vertical velocity, the inputs
+    agents get through predict_jump_batch. The reward is 1 per frame plus
+    the crash bonus, so an episode's return is the fitness mainGame gives,
+    up to float rounding.
+    """
+
+    # pipe pairs on screen never exceed this
+    MAXPIPES = 3
+    # x of unused pipe slots, far enough right to never be hit or passed
+    NOPIPEX = 1e6
+    # order of the flap animation frames
+    PLAYERINDEXCYCLE = np.array([0, 1, 2, 1])
+
+    def __init__(self, game, numEnvs, seed=None):
+        self.game = game
+        self.numEnvs = numEnvs
+        # draws the course seeds of every episode
+        self.rng = np.random.default_rng(seed)
+
+        self.playerx = int(game.SCREENWIDTH * 0.2)
+        self.playerW = game.PLAYERWIDTH
+        self.playerH = game.PLAYERHEIGHT
+        self.pipeW = game.PIPEWIDTH
+        self.pipeVelX = -128 / game.FPS
+        self.startY = game.movementInfo["playery"]
+
+        self.courses = [None] * numEnvs
+        self.playery = np.zeros(numEnvs)
+        self.playerVelY = np.zeros(numEnvs, dtype=int)
+        self.score = np.zeros(numEnvs, dtype=int)
+        self.frame = np.zeros(numEnvs, dtype=int)
+        self.loopIter = np.zeros(numEnvs, dtype=int)
+        self.playerIndex = np.zeros(numEnvs, dtype=int)
+        self.nextAnimation = np.zeros(numEnvs, dtype=int)
+        # pipes per environment, unused slots sit far right of the screen
+        self.pipeX = np.full((numEnvs, self.MAXPIPES), self.NOPIPEX)
+        self.pipeGapY = np.zeros((numEnvs, self.MAXPIPES), dtype=int)
+        self.pipeCount = np.zeros(numEnvs, dtype=int)
+        self.nextPipeNumber = np.zeros(numEnvs, dtype=int)
+        self.vertical = np.zeros(numEnvs)
+
+    def reset(self, seeds=None):
+        """starts an episode in every environment, returning the observations
+
+        seeds gives the course seed of every environment, they are drawn
+        from the environment's own generator by default.
+        """
+        self.resetEnvs(np.arange(self.numEnvs), seeds)
+        return self.observe()
+
+    def resetEnvs(self, envs, seeds=None):
+        if seeds is None:
+            seeds = self.rng.integers(2**32, size=len(envs))
+        game = self.game
+        for env, seed in zip(envs.tolist(), seeds):
+            self.courses[env] = course = game.getCourse(int(seed))
+            self.pipeGapY[env] = [course.gap(k) for k in range(self.MAXPIPES)]
+        self.pipeX[envs] = [
+            (game.SCREENWIDTH / 2) + 200,
+            game.SCREENWIDTH + 200,
+            game.SCREENWIDTH + 200 + (game.SCREENWIDTH / 2),
+        ]
+        self.pipeCount[envs] = self.MAXPIPES
+        self.nextPipeNumber[envs] = self.MAXPIPES
+
+        self.playery[envs] = self.startY
+        self.playerVelY[envs] = PopulationSim.PLAYERFLAPACC
+        self.score[envs] = 0
+        self.frame[envs] = 0
+        self.loopIter[envs] = 0
+        self.playerIndex[envs] = 0
+        self.nextAnimation[envs] = 0
+
+    @property
+    def upperY(self):
+        return self.pipeGapY - self.game.PIPEHEIGHT
+
+    @property
+    def lowerY(self):
+        return self.pipeGapY + self.game.PIPEGAPSIZE
+
+    def observe(self):
+        """returns an (N, 3) array of horizontal, vertical distance and velocity"""
+        # the next pipe ahead of the bird, the gap is the one of the first pipe
+        ahead = np.argmax(self.pipeX > self.playerx, axis=1)
+        horizontal = self.pipeX[np.arange(self.numEnvs), ahead] - self.playerx
+        holeY = (self.upperY[:, 0] + self.lowerY[:, 0]) / 2
+        self.vertical = holeY - self.playery
+        return np.stack([horizontal, self.vertical, self.playerVelY], axis=1)
+
+    def step(self, actions):
+        """flaps the birds whose action is true and advances every game a frame
+
+        Returns observations, rewards, done flags and an info dict of arrays:
+        the score and truncated flag of every episode and the observation an
+        episode ended with, since observations of done environments already
+        belong to their next episode.
+        """
+        game = self.game
+        jumps = np.asarray(actions, dtype=bool)
+        self.playerVelY[jumps] = PopulationSim.PLAYERFLAPACC
+        rewards = np.ones(self.numEnvs)
+
+        # check for crash here, birds of one flap frame are tested together
+        crashed = np.zeros(self.numEnvs, dtype=bool)
+        upperY, lowerY = self.upperY, self.lowerY
+        for playerIndex in np.unique(self.playerIndex):
+            envs = np.flatnonzero(self.playerIndex == playerIndex)
+            crashed[envs], _ = game.COLLIDER.checkCrash(
+                self.playerx,
+                self.playery[envs],
+                playerIndex,
+                self.pipeX[envs],
+                upperY[envs],
+                lowerY[envs],
+            )
+        # dead level with the hole gets the one pixel bonus, like mainGame
+        distance = np.abs(self.vertical[crashed])
+        distance[distance == 0] = 1
+        rewards[crashed] += 1 / distance
+
+        # check for score, every bird shares the same x
+        playerMidPos = self.playerx + self.playerW / 2
+        pipeMidPos = self.pipeX + self.pipeW / 2
+        passed = (pipeMidPos <= playerMidPos) & (playerMidPos < pipeMidPos + 6)
+        self.score[~crashed] += passed[~crashed].sum(axis=1)
+
+        # player's movement
+        velY = self.playerVelY
+        falling = (velY < PopulationSim.PLAYERMAXVELY) & ~jumps
+        velY[falling] += PopulationSim.PLAYERACCY
+        self.playery += np.minimum(velY, game.BASEY - self.playery - self.playerH)
+
+        self.advanceWorld()
+
+        truncated = np.zeros(self.numEnvs, dtype=bool)
+        if game.MAXFRAMES is not None:
+            truncated |= self.frame >= game.MAXFRAMES
+        if game.MAXSCORE is not None:
+            truncated |= self.score >= game.MAXSCORE
+        truncated &= ~crashed
+        dones = crashed | truncated
+
+        infos = {"score": self.score.copy(), "truncated": truncated}
+        observations = self.observe()
+        if dones.any():
+            infos["finalObservation"] = observations.copy()
+            self.resetEnvs(np.flatnonzero(dones))
+            observations = self.observe()
+        return observations, rewards, dones, infos
+
+    def advanceWorld(self):
+        """moves and spawns or removes the pipes of every environment"""
+        tick = (self.loopIter + 1) % 3 == 0
+        self.playerIndex[tick] = self.PLAYERINDEXCYCLE[self.nextAnimation[tick]]
+        self.nextAnimation[tick] = (self.nextAnimation[tick] + 1) % 4
+        self.loopIter = (self.loopIter + 1) % 30
+        self.frame += 1
+
+        # move pipes to left
+        self.pipeX += self.pipeVelX
+        self.pipeX[np.arange(self.MAXPIPES) >= self.pipeCount[:, None]] = self.NOPIPEX
+
+        # add new pipe when first pipe is about to touch left of screen
+        first = self.pipeX[:, 0]
+        for env in np.flatnonzero(
+            (self.pipeCount < self.MAXPIPES) & (0 < first) & (first < 5)
+        ).tolist():
+            slot = self.pipeCount[env]
+            self.pipeX[env, slot] = self.game.SCREENWIDTH + 10
+            self.pipeGapY[env, slot] = self.courses[env].gap(self.nextPipeNumber[env])
+            self.pipeCount[env] += 1
+            self.nextPipeNumber[env] += 1
+
+        # remove first pipe if its out of the screen
+        gone = self.pipeX[:, 0] < -self.pipeW
+        if gone.any():
+            self.pipeX[gone] = np.roll(self.pipeX[gone], -1, axis=1)
+            self.pipeGapY[gone] = np.roll(self.pipeGapY[gone], -1, axis=1)
+            self.pipeX[gone, -1] = self.NOPIPEX
+            self.pipeCount[gone] -= 1
@@ -4,25 +4,57 @@ https://github.com/sourabhv/FlapPyBird
 """
 
 from itertools import cycle
+import hashlib
+import os
 import random
 import sys
+import tempfile
+import zipfile
 
+import numpy as np
 import pygame
 from pygame.locals import *
 
-try:
-    xrange
-except NameError:
-    xrange = range
+from flappy_collision import BitmaskCollider
+from flappy_course import PipeCourse
+from flappy_replay import ReplayRecorder, ReplaySim
+from flappy_sim import PopulationSim
+from flappy_stats import GenerationStats
 
+BASE_SPRITE = "assets/sprites/base.png"
+# hitmasks and sprite sizes, recomputed whenever a sprite file changes
+HITMASK_CACHE = "assets/hitmasks.npz"
 
 class FlappyGame:
-    def __init__(self):
+    def __init__(
+        self,
+        headless=False,
+        audio=True,
+        maxFrames=None,
+        maxScore=None,
+        stagnationFrames=None,
+        profile=False,
+        hitmaskCache=HITMASK_CACHE,
+    ):
+        # headless games run the same rules without display, mixer or FPS cap
+        self.headless = headless
+        self.audio = audio and not headless
+        # a generation also ends after MAXFRAMES frames, once a bird reaches
+        # MAXSCORE or when no bird died for STAGNATIONFRAMES frames
+        self.MAXFRAMES = maxFrames
+        self.MAXSCORE = maxScore
+        self.STAGNATIONFRAMES = stagnationFrames
+        # profiled games time every frame phase, see crashInfo["stats"]
+        self.profile = profile
+        # where hitmasks are cached between runs
+        self.hitmaskCache = hitmaskCache
         self.FPS = 30
         self.SCREENWIDTH = 288
         self.SCREENHEIGHT = 512
         self.PIPEGAPSIZE = 100  # gap between upper and lower part of pipe
         self.BASEY = self.SCREENHEIGHT * 0.79
+        # range of visible player rotations while playing
+        self.MINROT, self.MAXROT = -90, 20
         # image, sound and hitmask  dicts
         self.IMAGES, self.SOUNDS, self.HITMASKS = {}, {}, {}
 
@@ -60,98 +92,44 @@ class FlappyGame:
             "assets/sprites/pipe-red.png",
         )
 
-        pygame.init()
-        self.FPSCLOCK = pygame.time.Clock()
-        self.SCREEN = pygame.display.set_mode((self.SCREENWIDTH, self.SCREENHEIGHT))
-        pygame.display.set_caption("Flappy Bird")
-
-        # numbers sprites for score display
-        self.IMAGES["numbers"] = (
-            pygame.image.load("assets/sprites/0.png").convert_alpha(),
-            pygame.image.load("assets/sprites/1.png").convert_alpha(),
-            pygame.image.load("assets/sprites/2.png").convert_alpha(),
-            pygame.image.load("assets/sprites/3.png").convert_alpha(),
-            pygame.image.load("assets/sprites/4.png").convert_alpha(),
-            pygame.image.load("assets/sprites/5.png").convert_alpha(),
-            pygame.image.load("assets/sprites/6.png").convert_alpha(),
-            pygame.image.load("assets/sprites/7.png").convert_alpha(),
-            pygame.image.load("assets/sprites/8.png").convert_alpha(),
-            pygame.image.load("assets/sprites/9.png").convert_alpha(),
-        )
-
-        # game over sprite
-        self.IMAGES["gameover"] = pygame.image.load(
-            "assets/sprites/gameover.png"
-        ).convert_alpha()
-        # message sprite for welcome screen
-        self.IMAGES["message"] = pygame.image.load(
-            "assets/sprites/message.png"
-        ).convert_alpha()
-        # base (ground) sprite
-        self.IMAGES["base"] = pygame.image.load(
-            "assets/sprites/base.png"
-        ).convert_alpha()
-
-        # sounds
-        if "win" in sys.platform:
-            soundExt = ".wav"
-        else:
-            soundExt = ".ogg"
-
-        self.SOUNDS["die"] = pygame.mixer.Sound("assets/audio/die" + soundExt)
-        self.SOUNDS["hit"] = pygame.mixer.Sound("assets/audio/hit" + soundExt)
-        self.SOUNDS["point"] = pygame.mixer.Sound("assets/audio/point" + soundExt)
-        self.SOUNDS["swoosh"] = pygame.mixer.Sound("assets/audio/swoosh" + soundExt)
-        self.SOUNDS["wing"] = pygame.mixer.Sound("assets/audio/wing" + soundExt)
+        if not self.headless:
+            pygame.display.init()
+            if self.audio:
+                pygame.mixer.init()
+            self.FPSCLOCK = pygame.time.Clock()
+            self.SCREEN = pygame.display.set_mode(
+                (self.SCREENWIDTH, self.SCREENHEIGHT)
+            )
+            pygame.display.set_caption("Flappy Bird")
 
-        # select random background sprites
+        # select random background, player and pipe sprites
         randBg = random.randint(0, len(self.BACKGROUNDS_LIST) - 1)
-        self.IMAGES["background"] = pygame.image.load(
-            self.BACKGROUNDS_LIST[randBg]
-        ).convert()
-
-        # select random player sprites
         randPlayer = random.randint(0, len(self.PLAYERS_LIST) - 1)
-        self.IMAGES["player"] = (
-            pygame.image.load(self.PLAYERS_LIST[randPlayer][0]).convert_alpha(),
-            pygame.image.load(self.PLAYERS_LIST[randPlayer][1]).convert_alpha(),
-            pygame.image.load(self.PLAYERS_LIST[randPlayer][2]).convert_alpha(),
-        )
-
-        # select random pipe sprites
         pipeindex = random.randint(0, len(self.PIPES_LIST) - 1)
-        self.IMAGES["pipe"] = (
-            pygame.transform.flip(
-                pygame.image.load(self.PIPES_LIST[pipeindex]).convert_alpha(),
-                False,
-                True,
-            ),
-            pygame.image.load(self.PIPES_LIST[pipeindex]).convert_alpha(),
-        )
 
-        # hitmask for pipes
-        self.HITMASKS["pipe"] = (
-            self.getHitmask(self.IMAGES["pipe"][0]),
-            self.getHitmask(self.IMAGES["pipe"][1]),
+        # hitmasks and sprite sizes are all the rules need, sprites and sounds
+        # are only loaded when they are drawn or played
+        self.loadHitmasks(
+            self.PLAYERS_LIST[randPlayer],
+            self.PIPES_LIST[pipeindex],
+            self.BACKGROUNDS_LIST[randBg],
         )
+        if not self.headless:
+            self.loadImages(randBg, randPlayer, pipeindex)
+        if self.audio:
+            self.loadSounds()
 
-        # hitmask for player
-        self.HITMASKS["player"] = (
-            self.getHitmask(self.IMAGES["player"][0]),
-            self.getHitmask(self.IMAGES["player"][1]),
-            self.getHitmask(self.IMAGES["player"][2]),
+        self.COLLIDER = BitmaskCollider(
+            self.HITMASKS["player"], self.HITMASKS["pipe"], self.BASEY
         )
 
         playerx = int(self.SCREENWIDTH * 0.2)
-        playery = int((self.SCREENHEIGHT - self.IMAGES["player"][0].get_height()) / 2)
+        playery = int((self.SCREENHEIGHT - self.PLAYERHEIGHT) / 2)
         playerShmVals = {"val": 0, "dir": 1}
         basex = 0
         playerIndexGen = cycle([0, 1, 2, 1])
 
-        baseShift = (
-            self.IMAGES["base"].get_width() - self.IMAGES["background"].get_width()
-        )
-        basex = -((-basex + 4) % baseShift)
+        basex = -((-basex + 4) % self.BASESHIFT)
         self.playerShm(playerShmVals)
 
         self.movementInfo = {
@@ -160,6 +138,9 @@ class FlappyGame:
             "playerIndexGen": playerIndexGen,
         }
 
+        if self.headless:
+            return
+
         # draw sprites
         self.SCREEN.blit(self.IMAGES["background"], (0, 0))
         self.SCREEN.blit(
@@ -170,185 +151,306 @@ class FlappyGame:
         pygame.display.update()
         self.FPSCLOCK.tick(self.FPS)
 
-    def play(self):
-        self.SOUNDS["wing"].play()
-        crashInfo = self.mainGame(self.movementInfo)
-        self.showGameOverScreen(crashInfo)
+    def loadImages(self, randBg, randPlayer, pipeindex):
+        """loads every sprite needed to draw the game"""
+        # numbers sprites for score display
+        self.IMAGES["numbers"] = (
+            self.loadImage("assets/sprites/0.png"),
+            self.loadImage("assets/sprites/1.png"),
+            self.loadImage("assets/sprites/2.png"),
+            self.loadImage("assets/sprites/3.png"),
+            self.loadImage("assets/sprites/4.png"),
+            self.loadImage("assets/sprites/5.png"),
+            self.loadImage("assets/sprites/6.png"),
+            self.loadImage("assets/sprites/7.png"),
+            self.loadImage("assets/sprites/8.png"),
+            self.loadImage("assets/sprites/9.png"),
+        )
 
-    def mainGame(self, movementInfo, agents):
-        playerIndex = loopIter = 0
-        n_agents = len(agents)
-        playerIndexGen = movementInfo["playerIndexGen"]
-        playerx, playery = int(self.SCREENWIDTH * 0.2), [movementInfo["playery"]] * n_agents
+        # game over sprite
+        self.IMAGES["gameover"] = self.loadImage("assets/sprites/gameover.png")
+        # message sprite for welcome screen
+        self.IMAGES["message"] = self.loadImage("assets/sprites/message.png")
+        # base (ground) sprite
+        self.IMAGES["base"] = self.loadImage(BASE_SPRITE)
 
-        basex = movementInfo["basex"]
-        baseShift = (
-            self.IMAGES["base"].get_width() - self.IMAGES["background"].get_width()
+        # selected background sprites
+        self.IMAGES["background"] = self.loadImage(
+            self.BACKGROUNDS_LIST[randBg], alpha=False
         )
 
-        # get 2 new pipes to add to upperPipes lowerPipes list
-        newPipe0 = self.getRandomPipe()
-        newPipe1 = self.getRandomPipe()
-        newPipe2 = self.getRandomPipe()
-
-        # list of upper pipes
-        upperPipes = [
-            {"x": (self.SCREENWIDTH / 2) + 200, "y": newPipe0[0]["y"]},
-            {"x": self.SCREENWIDTH + 200, "y": newPipe1[0]["y"]},
-            {
-                "x": self.SCREENWIDTH + 200 + (self.SCREENWIDTH / 2),
-                "y": newPipe2[0]["y"],
-            },
-        ]
+        # selected player sprites
+        self.IMAGES["player"] = (
+            self.loadImage(self.PLAYERS_LIST[randPlayer][0]),
+            self.loadImage(self.PLAYERS_LIST[randPlayer][1]),
+            self.loadImage(self.PLAYERS_LIST[randPlayer][2]),
+        )
 
-        # list of lowerpipe
-        lowerPipes = [
-            {"x": (self.SCREENWIDTH / 2) + 200, "y": newPipe0[1]["y"]},
-            {"x": self.SCREENWIDTH + 200, "y": newPipe1[1]["y"]},
-            {
-                "x": self.SCREENWIDTH + 200 + (self.SCREENWIDTH / 2),
-                "y": newPipe2[1]["y"],
-            },
-        ]
+        # selected pipe sprites
+        self.IMAGES["pipe"] = (
+            pygame.transform.flip(
+                self.loadImage(self.PIPES_LIST[pipeindex]),
+                False,
+                True,
+            ),
+            self.loadImage(self.PIPES_LIST[pipeindex]),
+        )
 
-        dt = self.FPSCLOCK.tick(self.FPS) / 1000
-        pipeVelX = -128 * dt
-
-        # player velocity, max velocity, downward acceleration, acceleration on flap
-        playerVelY = [-9] * n_agents  # player's velocity along Y, default same as playerFlapped
-        playerMaxVelY = 10  # max vel along Y, max descend speed
-        playerAccY = 1  # players downward acceleration
-        playerRot = [45] * n_agents  # player's rotation
-        playerVelRot = 3  # angular speed
-        playerRotThr = 20  # rotation threshold
-        playerFlapAcc = -9  # players speed on flapping
-        playerFlapped = [False] * n_agents  # True when player flaps
-        playerFitness = [0] * n_agents # Fitness of players
-        playerAlive = [True] * n_agents # If player still alive
-        score = [0] * n_agents
+        # every visible rotation of every flap frame, rendered once so drawing
+        # a bird never allocates, indexed [playerIndex][rotation - MINROT]
+        self.PLAYER_ATLAS = tuple(
+            tuple(
+                pygame.transform.rotate(image, rot)
+                for rot in range(self.MINROT, self.MAXROT + 1)
+            )
+            for image in self.IMAGES["player"]
+        )
+        self.dirtyRects = None
 
-        while True:
-            for event in pygame.event.get():
-                if event.type == QUIT or (
-                    event.type == KEYDOWN and event.key == K_ESCAPE
-                ):
-                    pygame.quit()
-                    sys.exit()
-
-            # Determine agent action
-            for i, agent in enumerate(agents):
-                if playerAlive[i]:
-                    dist_to_pipe = next(pipe for pipe in upperPipes if pipe["x"] > playerx)["x"] - playerx
-                    vertical_dist_to_hole = ((upperPipes[0]["y"] + lowerPipes[0]["y"]) / 2) - playery[i]
-                    if agent.predict_jump(dist_to_pipe, vertical_dist_to_hole):
-                        playerVelY[i] = playerFlapAcc
-                        playerFlapped[i] = True
-                        self.SOUNDS["wing"].play()
-
-                    # increase fitness
-                    playerFitness[i] += 1
-
-                    # check for crash here
-                    crashTest = self.checkCrash(
-                        {"x": playerx, "y": playery[i], "index": playerIndex},
-                        upperPipes,
-                        lowerPipes,
-                    )
-                    if crashTest[0]:
-                        playerAlive[i] = False
-                        # Add distance to vertical hole to fitness for hot start
-                        playerFitness[i] += abs(1 / vertical_dist_to_hole)
-
-                        if not any(playerAlive):
-                            return {
-                                "y": playery[i],
-                                "groundCrash": crashTest[1],
-                                "basex": basex,
-                                "upperPipes": upperPipes,
-                                "lowerPipes": lowerPipes,
-                                "score": score[i],
-                                "playerVelY": playerVelY[i],
-                                "playerRot": playerRot[i],
-                                "fitness": playerFitness,
-                            }
-
-                    # check for score
-                    playerMidPos = playerx + self.IMAGES["player"][0].get_width() / 2
-                    for pipe in upperPipes:
-                        pipeMidPos = pipe["x"] + self.IMAGES["pipe"][0].get_width() / 2
-                        if pipeMidPos <= playerMidPos < pipeMidPos + 6:
-                            score[i] += 1
-                            self.SOUNDS["point"].play()
-
-                    # rotate the player
-                    if playerRot[i] > -90:
-                        playerRot[i] -= playerVelRot
-
-                    # player's movement
-                    if playerVelY[i] < playerMaxVelY and not playerFlapped[i]:
-                        playerVelY[i] += playerAccY
-                    if playerFlapped:
-                        playerFlapped[i] = False
-
-                        # more rotation to cover the threshold (calculated in visible rotation)
-                        playerRot[i] = 45
-
-                    playerHeight = self.IMAGES["player"][playerIndex].get_height()
-                    playery[i] += min(playerVelY[i], self.BASEY - playery[i] - playerHeight)
-
-            # playerIndex basex change
-            if (loopIter + 1) % 3 == 0:
-                playerIndex = next(playerIndexGen)
-            loopIter = (loopIter + 1) % 30
-            basex = -((-basex + 100) % baseShift)
-
-            # move pipes to left
-            for uPipe, lPipe in zip(upperPipes, lowerPipes):
-                uPipe["x"] += pipeVelX
-                lPipe["x"] += pipeVelX
-
-            # add new pipe when first pipe is about to touch left of screen
-            if 3 > len(upperPipes) > 0 and 0 < upperPipes[0]["x"] < 5:
-                newPipe = self.getRandomPipe()
-                upperPipes.append(newPipe[0])
-                lowerPipes.append(newPipe[1])
-
-            # remove first pipe if its out of the screen
-            if (
-                len(upperPipes) > 0
-                and upperPipes[0]["x"] < -self.IMAGES["pipe"][0].get_width()
-            ):
-                upperPipes.pop(0)
-                lowerPipes.pop(0)
+    def loadSounds(self):
+        """loads the sound effects"""
+        if "win" in sys.platform:
+            soundExt = ".wav"
+        else:
+            soundExt = ".ogg"
 
-            # draw sprites
-            self.SCREEN.blit(self.IMAGES["background"], (0, 0))
+        self.SOUNDS["die"] = pygame.mixer.Sound("assets/audio/die" + soundExt)
+        self.SOUNDS["hit"] = pygame.mixer.Sound("assets/audio/hit" + soundExt)
+        self.SOUNDS["point"] = pygame.mixer.Sound("assets/audio/point" + soundExt)
+        self.SOUNDS["swoosh"] = pygame.mixer.Sound("assets/audio/swoosh" + soundExt)
+        self.SOUNDS["wing"] = pygame.mixer.Sound("assets/audio/wing" + soundExt)
 
-            for uPipe, lPipe in zip(upperPipes, lowerPipes):
-                self.SCREEN.blit(self.IMAGES["pipe"][0], (uPipe["x"], uPipe["y"]))
-                self.SCREEN.blit(self.IMAGES["pipe"][1], (lPipe["x"], lPipe["y"]))
+    def loadHitmasks(self, playerPaths, pipePath, backgroundPath):
+        """sets the hitmasks and sprite sizes, from the cache when it is current"""
+        paths = [path for player in self.PLAYERS_LIST for path in player]
+        paths += list(self.PIPES_LIST) + list(self.BACKGROUNDS_LIST) + [BASE_SPRITE]
+        digest = hashlib.sha1()
+        for path in paths:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        digest = digest.hexdigest()
+
+        masks = None
+        try:
+            with np.load(self.hitmaskCache) as cache:
+                if str(cache["digest"]) == digest:
+                    masks = {name: cache[name] for name in cache.files}
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            pass  # missing or damaged cache, recompute it
+
+        if masks is None:
+            # sprites changed or no cache yet, compute every mask once
+            masks = {"digest": np.array(digest)}
+            for path in paths:
+                image = pygame.image.load(path)
+                masks[self.spriteName(path)] = self.getHitmask(image)
+                masks["size-" + self.spriteName(path)] = np.array(image.get_size())
+            # a temp file per process, workers may start at the same time
+            try:
+                fd, tmpPath = tempfile.mkstemp(
+                    dir=os.path.dirname(self.hitmaskCache) or ".", suffix=".tmp"
+                )
+            except OSError:
+                pass  # read-only checkout, recompute next time
+            else:
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        np.savez(f, **masks)
+                    os.replace(tmpPath, self.hitmaskCache)
+                except OSError:
+                    os.unlink(tmpPath)
+
+        # hitmask for pipes, the upper pipe is the lower one flipped
+        pipeMask = masks[self.spriteName(pipePath)]
+        self.HITMASKS["pipe"] = (pipeMask[:, ::-1], pipeMask)
 
-            self.SCREEN.blit(self.IMAGES["base"], (basex, self.BASEY))
-            # print score so player overlaps the score
-            self.showScore(max(score))
+        # hitmask for player
+        self.HITMASKS["player"] = tuple(
+            masks[self.spriteName(path)] for path in playerPaths
+        )
+
+        self.PLAYERWIDTH, self.PLAYERHEIGHT = self.HITMASKS["player"][0].shape
+        self.PIPEWIDTH, self.PIPEHEIGHT = pipeMask.shape
+        self.BASESHIFT = int(
+            masks["size-" + self.spriteName(BASE_SPRITE)][0]
+            - masks["size-" + self.spriteName(backgroundPath)][0]
+        )
 
-            for i, alive in enumerate(playerAlive):
-                if alive:
-                    # Player rotation has a threshold
-                    visibleRot = playerRotThr
-                    if playerRot[i] <= playerRotThr:
-                        visibleRot = playerRot[i]
+    @staticmethod
+    def spriteName(path):
+        return os.path.splitext(os.path.basename(path))[0]
 
-                    playerSurface = pygame.transform.rotate(
-                        self.IMAGES["player"][playerIndex], visibleRot
-                    )
-                    self.SCREEN.blit(playerSurface, (playerx, playery[i]))
+    def loadImage(self, path, alpha=True):
+        """loads a sprite, converting it for fast blitting when a display exists"""
+        image = pygame.image.load(path)
+        if self.headless:
+            return image
+        return image.convert_alpha() if alpha else image.convert()
 
-            pygame.display.update()
-            self.FPSCLOCK.tick(self.FPS)
+    def playSound(self, name):
+        """plays a sound, unless audio is off"""
+        if self.audio:
+            self.SOUNDS[name].play()
+
+    def play(self):
+        self.playSound("wing")
+        crashInfo = self.mainGame(self.movementInfo)
+        self.showGameOverScreen(crashInfo)
+
+    def mainGame(
+        self,
+        movementInfo,
+        agents,
+        seed=None,
+        render=None,
+        topK=None,
+        course=None,
+        record=False,
+        snapshot=None,
+    ):
+        """plays one generation on course, or on the course drawn from seed
+
+        render defaults to drawing whenever a display exists, an unrendered
+        generation runs uncapped like a headless one. topK limits drawing to
+        the first topK live birds in agent order. Recorded generations return
+        the jumps of every bird as crashInfo["replay"]. A WorldSnapshot starts
+        every bird from its state on its course instead of from movementInfo,
+        MAXFRAMES still counts from the start of the course.
+        """
+        if record and snapshot is not None:
+            raise ValueError("replays start from movementInfo, not from a snapshot")
+        stats = GenerationStats() if self.profile else None
+        recorder = ReplayRecorder(len(agents)) if record else None
+        sim = PopulationSim(
+            self,
+            agents,
+            movementInfo,
+            seed,
+            stats=stats,
+            course=course,
+            recorder=recorder,
+            snapshot=snapshot,
+        )
+        crashInfo = self.runSim(sim, render, topK)
+        if recorder is not None:
+            crashInfo["replay"] = recorder.finish(sim, movementInfo)
+        return crashInfo
+
+    def replay(self, replay, birds=None, speed=1, render=None, topK=None):
+        """flies the given birds of a Replay again, all of them by default
+
+        speed scales the frame rate, the flight itself is the recorded one.
+        """
+        if birds is None:
+            birds = np.arange(len(replay))
+        stats = GenerationStats() if self.profile else None
+        sim = ReplaySim(self, replay, birds, stats=stats)
+        return self.runSim(sim, render, topK, fps=self.FPS * speed)
+
+    def snapshotReplay(self, replay, bird, frame):
+        """returns the WorldSnapshot of a recorded bird at frame of its flight
+
+        replay.endFrames[bird] minus a few dozen frames gives the world just
+        before the pipe the bird died at.
+        """
+        sim = ReplaySim(self, replay, [bird])
+        while sim.frame < frame and not sim.done:
+            sim.step()
+        if sim.done:
+            raise ValueError("bird %d did not fly until frame %d" % (bird, frame))
+        return sim.snapshot(0)
+
+    def runSim(self, sim, render=None, topK=None, fps=None):
+        """steps sim until it is done, drawing at fps frames per second"""
+        if render is None:
+            render = not self.headless
+        if render and self.headless:
+            raise ValueError("a headless game has no display to render on")
+        if render:
+            # the screen holds whatever was shown before, repaint it fully
+            self.dirtyRects = None
+        stats = sim.stats
+
+        while True:
+            if stats is not None:
+                stats.start()
+            # unrendered frames still check for quit now and then
+            if render or (not self.headless and sim.frame % 256 == 0):
+                for event in pygame.event.get():
+                    if event.type == QUIT or (
+                        event.type == KEYDOWN and event.key == K_ESCAPE
+                    ):
+                        pygame.quit()
+                        sys.exit()
+                if stats is not None:
+                    stats.lap("events")
+
+            sim.step()
+            if sim.done:
+                if stats is not None:
+                    sim.crashInfo["stats"] = stats
+                return sim.crashInfo
+
+            if not render:
+                continue
+
+            if sim.flapped.any():
+                self.playSound("wing")
+            if sim.scored:
+                self.playSound("point")
+            if stats is not None and self.audio:
+                stats.count("sounds", bool(sim.flapped.any()) + bool(sim.scored))
+
+            pygame.display.update(self.drawFrame(sim, topK))
+            if stats is not None:
+                stats.lap("render")
+            self.FPSCLOCK.tick(fps or self.FPS)
+            if stats is not None:
+                stats.lap("tick")
+
+    def drawFrame(self, sim, topK=None):
+        """draws the pipes, base, score and the first topK live birds
+
+        Only the areas drawn last frame are repainted with background, the
+        returned rects are the ones that need a display update. Set
+        dirtyRects to None to repaint the whole screen instead.
+        """
+        if self.dirtyRects is None:
+            self.SCREEN.blit(self.IMAGES["background"], (0, 0))
+            updateRects = [self.SCREEN.get_rect()]
+        else:
+            for rect in self.dirtyRects:
+                self.SCREEN.blit(self.IMAGES["background"], rect, rect)
+            updateRects = list(self.dirtyRects)
+
+        drawn = []
+        for pipeX, upperY, lowerY in zip(sim.pipeX, sim.upperY, sim.lowerY):
+            drawn.append(self.SCREEN.blit(self.IMAGES["pipe"][0], (pipeX, upperY)))
+            drawn.append(self.SCREEN.blit(self.IMAGES["pipe"][1], (pipeX, lowerY)))
+
+        drawn.append(self.SCREEN.blit(self.IMAGES["base"], (sim.basex, self.BASEY)))
+        # print score so player overlaps the score
+        drawn += self.showScore(int(sim.score.max()))
+
+        # Player rotation has a threshold
+        birds = sim.live[:topK]
+        visibleRot = np.minimum(sim.playerRot[birds], sim.PLAYERROTTHR) - self.MINROT
+        sprites = self.PLAYER_ATLAS[sim.playerIndex]
+        drawn += self.SCREEN.blits(
+            [
+                (sprites[rot], (sim.playerx, y))
+                for rot, y in zip(visibleRot.tolist(), sim.playery[birds].tolist())
+            ]
+        )
+
+        self.dirtyRects = drawn
+        return updateRects + drawn
 
     def showGameOverScreen(self, crashInfo):
         """crashes the player down and shows gameover image"""
+        if self.headless:
+            return
+
         score = crashInfo["score"]
         playerx = self.SCREENWIDTH * 0.2
         playery = crashInfo["y"]
@@ -363,9 +465,9 @@ class FlappyGame:
         upperPipes, lowerPipes = crashInfo["upperPipes"], crashInfo["lowerPipes"]
 
         # play hit and die sounds
-        self.SOUNDS["hit"].play()
+        self.playSound("hit")
         if not crashInfo["groundCrash"]:
-            self.SOUNDS["die"].play()
+            self.playSound("die")
 
         i = 0
         while i < 2 * self.FPS:
@@ -410,12 +512,30 @@ class FlappyGame:
         else:
             playerShm["val"] -= 1
 
-    def getRandomPipe(self):
+    def getCourse(self, seed=None, length=None):
+        """returns the PipeCourse drawn from seed, or from a random seed
+
+        The course covers MAXFRAMES when it is set and grows on demand.
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        if length is None:
+            # a new pipe enters every half screen width
+            framesPerPipe = (self.SCREENWIDTH / 2) / (128 / self.FPS)
+            length = int(self.MAXFRAMES / framesPerPipe) + 4 if self.MAXFRAMES else 64
+        return PipeCourse.generate(
+            seed,
+            length,
+            int(self.BASEY * 0.2),
+            int(self.BASEY * 0.6 - self.PIPEGAPSIZE),
+        )
+
+    def getRandomPipe(self, rng=random):
         """returns a randomly generated pipe"""
         # y of gap between upper and lower pipe
-        gapY = random.randrange(0, int(self.BASEY * 0.6 - self.PIPEGAPSIZE))
+        gapY = rng.randrange(0, int(self.BASEY * 0.6 - self.PIPEGAPSIZE))
         gapY += int(self.BASEY * 0.2)
-        pipeHeight = self.IMAGES["pipe"][0].get_height()
+        pipeHeight = self.PIPEHEIGHT
         pipeX = self.SCREENWIDTH + 10
 
         return [
@@ -424,7 +544,7 @@ class FlappyGame:
         ]
 
     def showScore(self, score):
-        """displays score in center of screen"""
+        """displays score in center of screen, returning the rects drawn"""
         scoreDigits = [int(x) for x in list(str(score))]
         totalWidth = 0  # total width of all numbers to be printed
 
@@ -433,17 +553,21 @@ class FlappyGame:
 
         Xoffset = (self.SCREENWIDTH - totalWidth) / 2
 
+        rects = []
         for digit in scoreDigits:
-            self.SCREEN.blit(
-                self.IMAGES["numbers"][digit], (Xoffset, self.SCREENHEIGHT * 0.1)
+            rects.append(
+                self.SCREEN.blit(
+                    self.IMAGES["numbers"][digit], (Xoffset, self.SCREENHEIGHT * 0.1)
+                )
             )
             Xoffset += self.IMAGES["numbers"][digit].get_width()
+        return rects
 
     def checkCrash(self, player, upperPipes, lowerPipes):
         """returns True if player collides with base or pipes."""
         pi = player["index"]
-        player["w"] = self.IMAGES["player"][0].get_width()
-        player["h"] = self.IMAGES["player"][0].get_height()
+        player["w"] = self.PLAYERWIDTH
+        player["h"] = self.PLAYERHEIGHT
 
         # if player crashes into ground
         if player["y"] + player["h"] >= self.BASEY - 1:
@@ -451,8 +575,8 @@ class FlappyGame:
         else:
 
             playerRect = pygame.Rect(player["x"], player["y"], player["w"], player["h"])
-            pipeW = self.IMAGES["pipe"][0].get_width()
-            pipeH = self.IMAGES["pipe"][0].get_height()
+            pipeW = self.PIPEWIDTH
+            pipeH = self.PIPEHEIGHT
 
             for uPipe, lPipe in zip(upperPipes, lowerPipes):
                 # upper and lower pipe rects
@@ -487,20 +611,25 @@ class FlappyGame:
         x1, y1 = rect.x - rect1.x, rect.y - rect1.y
         x2, y2 = rect.x - rect2.x, rect.y - rect2.y
 
-        for x in xrange(rect.width):
-            for y in xrange(rect.height):
-                if hitmask1[x1 + x][y1 + y] and hitmask2[x2 + x][y2 + y]:
-                    return True
-        return False
+        hitmask1, hitmask2 = np.asarray(hitmask1), np.asarray(hitmask2)
+        overlap1 = hitmask1[x1 : x1 + rect.width, y1 : y1 + rect.height]
+        overlap2 = hitmask2[x2 : x2 + rect.width, y2 : y2 + rect.height]
+        return bool(np.any(overlap1 & overlap2))
+
+    def checkCrashBatch(self, playerx, playery, playerIndex, upperPipes, lowerPipes):
+        """returns crashed and groundCrash flags for birds at the given heights"""
+        return self.COLLIDER.checkCrash(
+            playerx,
+            playery,
+            playerIndex,
+            [uPipe["x"] for uPipe in upperPipes],
+            [uPipe["y"] for uPipe in upperPipes],
+            [lPipe["y"] for lPipe in lowerPipes],
+        )
 
     def getHitmask(self, image):
-        """returns a hitmask using an image's alpha."""
-        mask = []
-        for x in xrange(image.get_width()):
-            mask.append([])
-            for y in xrange(image.get_height()):
-                mask[x].append(bool(image.get_at((x, y))[3]))
-        return mask
+        """returns a hitmask using an image's alpha, indexed as mask[x][y]"""
+        return pygame.surfarray.array_alpha(image) > 0
 
 
 if __name__ == "__main__":
@@ -1,11 +1,304 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from flappy_cache import FitnessCache
 from flappy_game import FlappyGame
-from agents.random import RandomAgent
+from flappy_log import GenerationLog
+from flappy_options import AGENTS, gaParser
+from flappy_parallel import ParallelEvaluator
+from flappy_population import Population
+from flappy_racing import RacingEvaluator
+from flappy_spectator import Spectator
+
+
+def replayPath(directory, generation):
+    return os.path.join(directory, "generation-%04d.npz" % generation)
+
+
+parser = argparse.ArgumentParser(
+    description="Train flappy bird agents", parents=[gaParser]
+)
+parser.add_argument(
+    "--headless",
+    action="store_true",
+    help="simulate without display, sound or frame rate cap",
+)
+parser.add_argument(
+    "--course-every",
+    type=int,
+    default=None,
+    help="generation i flies the course seed + i // course_every, default 10 with "
+    "--cache-size and 1 without",
+)
+parser.add_argument(
+    "--courses",
+    type=int,
+    default=1,
+    help="rate agents by their mean fitness over this many courses, dropping "
+    "clear losers after every course from the second on",
+)
+parser.add_argument(
+    "--keep-fraction",
+    type=float,
+    default=0.5,
+    help="share of agents flying on after each course, see --courses",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="evaluate headless across this many processes",
+)
+parser.add_argument(
+    "--max-score", type=int, default=None, help="end a generation at this score"
+)
+parser.add_argument(
+    "--stagnation-frames",
+    type=int,
+    default=None,
+    help="end a generation when no bird died for this many frames, this makes "
+    "fitness depend on the rest of the population, so it can not be combined "
+    "with --cache-size or --workers",
+)
+parser.add_argument(
+    "--render-every",
+    type=int,
+    default=None,
+    help="draw every Nth generation, 0 draws none, default 1",
+)
+parser.add_argument(
+    "--render-best",
+    action="store_true",
+    help="also draw the generation after a new best fitness",
+)
+parser.add_argument(
+    "--top-k",
+    type=int,
+    default=None,
+    help="draw only the first k live birds, the elites unless --cache-size skips "
+    "simulating them",
+)
+parser.add_argument(
+    "--no-game-over", action="store_true", help="skip the game over animation"
+)
+parser.add_argument(
+    "--profile", action="store_true", help="print per phase timings every generation"
+)
+parser.add_argument(
+    "--cache-size",
+    type=int,
+    default=0,
+    help="remember this many fitness values of deterministic agents, hits need "
+    "--seed and the same course for several generations, see --course-every",
+)
+parser.add_argument(
+    "--cache-file", default=None, help="keep the fitness cache in this file"
+)
+parser.add_argument(
+    "--record-dir",
+    default=None,
+    help="save the jumps of every bird per generation here, see flappy_replay.py",
+)
+parser.add_argument(
+    "--checkpoint", default=None, help="save the population to this .npz file"
+)
+parser.add_argument(
+    "--checkpoint-every",
+    type=int,
+    default=1,
+    help="generations between checkpoints",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="continue from --checkpoint when it exists, the GA options are taken "
+    "from the checkpoint",
+)
+parser.add_argument(
+    "--log",
+    default=None,
+    help="append per generation statistics to this binary file, see flappy_log.py",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.record_dir is not None and args.courses > 1:
+        parser.error("--record-dir keeps one course per generation, drop --courses")
+    if args.record_dir is not None and args.cache_size > 0:
+        parser.error("--record-dir needs every agent simulated, drop --cache-size")
+    if args.workers > 1 and (
+        args.render_every is not None
+        or args.render_best
+        or args.top_k is not None
+        or args.no_game_over
+        or args.profile
+    ):
+        parser.error(
+            "--workers evaluate headless, --render-every, --render-best, --top-k, "
+            "--no-game-over and --profile need --workers 1"
+        )
+    if args.render_every is None:
+        args.render_every = 1
+    if args.course_every is None:
+        # elites only hit the cache while the course stays the same
+        args.course_every = 10 if args.cache_size > 0 else 1
+    if args.stagnation_frames is not None and (
+        args.cache_size > 0 or args.workers > 1
+    ):
+        parser.error(
+            "--stagnation-frames makes fitness depend on the population, it can "
+            "not be cached or split over --workers"
+        )
+    if args.record_dir is not None:
+        os.makedirs(args.record_dir, exist_ok=True)
+
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume needs --checkpoint")
+
+    if args.resume and os.path.exists(args.checkpoint):
+        population = Population.load(args.checkpoint, AGENTS[args.agent])
+        print("resuming at generation %d" % population.generation)
+    else:
+        population = Population(
+            AGENTS[args.agent],
+            args.population,
+            eliteFraction=args.elite,
+            mutationRate=args.mutation_rate,
+            seed=args.seed,
+        )
+
+    log = None
+    if args.log is not None:
+        log = GenerationLog(args.log)
+        # generations after the checkpoint are run again
+        log.truncate(population.generation)
+
+    gameOptions = {
+        "maxFrames": args.max_frames,
+        "maxScore": args.max_score,
+        "stagnationFrames": args.stagnation_frames,
+    }
+    spectator = Spectator(
+        every=args.render_every or None,
+        onNewBest=args.render_best,
+        topK=args.top_k,
+        gameOverScreen=not args.no_game_over,
+    )
+    # best score and frames simulated this generation over all its courses,
+    # for the log
+    lastRun = {}
+
+    def noteRun(scores, frames):
+        """adds one simulated course to the stats of the generation"""
+        lastRun["bestScore"] = max(lastRun.get("bestScore", -1), max(scores))
+        lastRun["frames"] = lastRun.get("frames", 0) + frames
+
+    if args.workers > 1:
+        evaluator = ParallelEvaluator(
+            args.workers, record=args.record_dir is not None, **gameOptions
+        )
+
+        def evaluate(agents, seed):
+            fitness = evaluator.evaluate(agents, seed)
+            noteRun(evaluator.scores, evaluator.frames)
+            if args.record_dir is not None:
+                evaluator.replay.save(
+                    replayPath(args.record_dir, population.generation)
+                )
+            return fitness
+
+    else:
+        game = FlappyGame(headless=args.headless, profile=args.profile, **gameOptions)
+
+        def evaluate(agents, seed):
+            render = not args.headless and spectator.shouldRender(population.generation)
+            crashInfo = game.mainGame(
+                game.movementInfo,
+                agents,
+                seed=seed,
+                render=render,
+                topK=spectator.topK,
+                record=args.record_dir is not None,
+            )
+            if args.record_dir is not None:
+                crashInfo["replay"].save(
+                    replayPath(args.record_dir, population.generation)
+                )
+            if args.profile:
+                print(crashInfo["stats"])
+            if render and spectator.gameOverScreen:
+                game.showGameOverScreen(crashInfo)
+            noteRun(crashInfo["scores"], crashInfo["frames"])
+            return crashInfo["fitness"]
+
+    cache = None
+    if args.cache_size > 0:
+        cache = FitnessCache(
+            args.cache_size, path=args.cache_file, tag=repr(sorted(gameOptions.items()))
+        )
+
+    def cachedEvaluate(agents, seed):
+        if cache is None:
+            return evaluate(agents, seed)
+        return cache.evaluate(agents, seed, evaluate)
+
+    racer = RacingEvaluator(cachedEvaluate, keepFraction=args.keep_fraction)
+
+    while population.generation < args.generations:
+        generation = population.generation
+        seed = None
+        if args.seed is not None:
+            seed = args.seed + generation // args.course_every
+        agents = population.agents()
+        lastRun.clear()
+        start = time.perf_counter()
+        if args.courses > 1:
+            seeds = [None] * args.courses
+            if seed is not None:
+                seeds = [seed * args.courses + k for k in range(args.courses)]
+            result = racer.race(agents, seeds)
+            fitness = result.mean
+        else:
+            fitness = cachedEvaluate(agents, seed)
+        evaluateSec = time.perf_counter() - start
 
-game = FlappyGame()
-agents = [RandomAgent(), RandomAgent(), RandomAgent(), RandomAgent(), RandomAgent(), RandomAgent()] * 6
+        print(
+            "generation %d: best %.2f, mean %.2f"
+            % (generation, np.max(fitness), np.mean(fitness))
+        )
+        if args.courses > 1:
+            print("  fittest agent: %s" % result)
+        spectator.update(fitness)
+        start = time.perf_counter()
+        population.evolve(result.fitness if args.courses > 1 else fitness)
+        evolveSec = time.perf_counter() - start
 
+        if log is not None:
+            log.append(
+                generation,
+                seed,
+                fitness,
+                bestScore=lastRun.get("bestScore", -1),
+                frames=lastRun.get("frames", -1),
+                evaluateSec=evaluateSec,
+                evolveSec=evolveSec,
+            )
+        if args.checkpoint is not None and (
+            population.generation % args.checkpoint_every == 0
+            or population.generation == args.generations
+        ):
+            population.save(args.checkpoint)
+            # a resumed run keeps its cache hits, cache.save is a no-op without
+            # --cache-file
+            if cache is not None:
+                cache.save()
 
-for i in range(10):
-    crashInfo = game.mainGame(game.movementInfo, agents)
-    print(crashInfo["fitness"])
-    game.showGameOverScreen(crashInfo)
+    if log is not None:
+        log.close()
+    if cache is not None:
+        cache.save()
+    if args.workers > 1:
+        evaluator.close()
@@ -0,0 +1,422 @@
+"""
+Island model evolution, populations in separate processes exchanging migrants
+
+Every island runs its own Population on its own courses. Every few
+generations each island sends copies of its best genomes to a coordinator,
+which passes them on around a ring, so island i receives the migrants of
+island i - 1. Islands talk to the coordinator over a Unix socket or TCP, so
+they can run on one machine or be started on several with --serve / --join.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from flappy_game import FlappyGame
+from flappy_options import AGENTS, gaParser
+from flappy_population import Population
+
+# JSON header and .npy genome lengths in front of every message
+MESSAGE_HEADER = struct.Struct("!II")
+
+
+def parseAddress(address):
+    """returns the socket family and address of "host:port" or a socket path
+
+    An empty host, ":port", binds every interface and connects to localhost.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def sendMessage(sock, header, genomes=None):
+    """sends a JSON header and an optional genome matrix"""
+    payload = b""
+    if genomes is not None:
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(genomes, dtype=float), allow_pickle=False)
+        payload = buffer.getvalue()
+    encoded = json.dumps(header).encode()
+    sock.sendall(MESSAGE_HEADER.pack(len(encoded), len(payload)) + encoded + payload)
+
+
+def recvExactly(sock, n):
+    data = bytearray(n)
+    view = memoryview(data)
+    while view:
+        received = sock.recv_into(view)
+        if not received:
+            raise ConnectionError("connection closed mid message")
+        view = view[received:]
+    return bytes(data)
+
+
+def recvMessage(sock):
+    """returns the header and genome matrix, None if none was sent"""
+    sizes = recvExactly(sock, MESSAGE_HEADER.size)
+    headerLen, payloadLen = MESSAGE_HEADER.unpack(sizes)
+    header = json.loads(recvExactly(sock, headerLen))
+    genomes = None
+    if payloadLen:
+        payload = io.BytesIO(recvExactly(sock, payloadLen))
+        genomes = np.load(payload, allow_pickle=False)
+    return header, genomes
+
+
+def recvReply(sock):
+    """receives a coordinator message, raising RuntimeError for an error one"""
+    header, genomes = recvMessage(sock)
+    if header["type"] == "error":
+        raise RuntimeError(header["reason"])
+    return header, genomes
+
+
+class MigrationCoordinator:
+    """routes migrants between a fixed number of islands around a ring
+
+    Islands first say hello with the settings of their run, every island
+    must use the settings of the first one. A migration is a barrier: every
+    island sends its migrants for an epoch and waits until all islands have
+    sent theirs, then receives the ones of its predecessor. Islands report
+    their best genome when they are done. A rejected island, a connection
+    dropping or an island finishing while others wait at a migration fails
+    the run: the barrier is lifted, the other islands get an error and
+    wait() raises.
+    """
+
+    def __init__(self, address, islands):
+        self.islands = islands
+        # settings of the first island to join, see runIsland
+        self.settings = None
+        self.joined = set()
+        self.migrants = {}
+        self.results = {}
+        self.failure = None
+        self.condition = threading.Condition()
+
+        family, self.address = parseAddress(address)
+        coordinator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                coordinator.serve(self.request)
+
+        if family == socket.AF_UNIX:
+            baseClass = socketserver.ThreadingUnixStreamServer
+        else:
+            baseClass = socketserver.ThreadingTCPServer
+
+        class Server(baseClass):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server(self.address, Handler)
+
+    def serve(self, sock):
+        """answers the messages of one island until it is done"""
+        island = None
+        try:
+            header, _ = recvMessage(sock)
+            reason = self.admit(header)
+            if reason is not None:
+                self.fail(reason)
+                sendMessage(sock, {"type": "error", "reason": reason})
+                return
+            island = header["island"]
+            sendMessage(sock, {"type": "welcome"})
+
+            while True:
+                header, genomes = recvMessage(sock)
+                if header["type"] == "done":
+                    with self.condition:
+                        self.results[island] = (header["fitness"], genomes)
+                        for epoch, migrants in self.migrants.items():
+                            if island not in migrants:
+                                self.fail(
+                                    "island %d finished while islands wait at "
+                                    "migration %d" % (island, epoch)
+                                )
+                        self.condition.notify_all()
+                    return
+
+                epoch = header["epoch"]
+                with self.condition:
+                    self.migrants.setdefault(epoch, {})[island] = genomes
+                    for finished in self.results:
+                        self.fail(
+                            "island %d reached migration %d after island %d "
+                            "finished" % (island, epoch, finished)
+                        )
+                    self.condition.notify_all()
+                    self.condition.wait_for(
+                        lambda: len(self.migrants[epoch]) == self.islands
+                        or self.failure is not None
+                    )
+                    failure = self.failure
+                    incoming = None
+                    if failure is None:
+                        incoming = self.migrants[epoch][(island - 1) % self.islands]
+                if failure is not None:
+                    sendMessage(sock, {"type": "error", "reason": failure})
+                    return
+                sendMessage(sock, {"type": "migrants", "epoch": epoch}, incoming)
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as error:
+            name = "an island" if island is None else "island %d" % island
+            self.fail("%s disconnected: %s" % (name, error))
+
+    def admit(self, hello):
+        """returns why an island can not join the run, None when it can"""
+        if hello["type"] != "hello":
+            return "expected a hello message, got %s" % hello["type"]
+        island, settings = hello["island"], hello["settings"]
+        if not 0 <= island < self.islands:
+            return "island %d is not one of 0..%d" % (island, self.islands - 1)
+        if settings["islands"] != self.islands:
+            return "island %d expects %d islands, the coordinator %d" % (
+                island,
+                settings["islands"],
+                self.islands,
+            )
+        with self.condition:
+            if self.failure is not None:
+                return self.failure
+            if island in self.joined:
+                return "island %d joined twice" % island
+            if self.settings is None:
+                self.settings = settings
+            differ = [
+                name
+                for name in sorted(set(settings) | set(self.settings))
+                if settings.get(name) != self.settings.get(name)
+            ]
+            if differ:
+                return "island %d differs from the first island in %s" % (
+                    island,
+                    ", ".join(differ),
+                )
+            self.joined.add(island)
+        return None
+
+    def fail(self, reason):
+        """aborts the run, releasing every island waiting at a migration"""
+        with self.condition:
+            if self.failure is None:
+                self.failure = reason
+            self.condition.notify_all()
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def wait(self, timeout=None):
+        """waits for every island to finish, returns {island: (fitness, genome)}
+
+        Returns None when timeout passes first and raises RuntimeError once
+        an island failed.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: len(self.results) == self.islands or self.failure is not None,
+                timeout,
+            )
+            if self.failure is not None:
+                raise RuntimeError(self.failure)
+            if len(self.results) < self.islands:
+                return None
+        return self.results
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str):
+            os.unlink(self.address)
+
+
+def connect(address):
+    family, address = parseAddress(address)
+    if family == socket.AF_INET and not address[0]:
+        address = ("127.0.0.1", address[1])
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def runIsland(address, island, islands, options):
+    """evolves one island, migrating every options["migrateEvery"] generations
+
+    Migrants are the island's elites, they replace the same number of
+    children, the last rows of the evolved population. Raises RuntimeError
+    when the coordinator rejects the island or the run failed.
+    """
+    seed = options["seed"]
+    population = Population(
+        AGENTS[options["agent"]],
+        options["population"],
+        eliteFraction=options["elite"],
+        mutationRate=options["mutationRate"],
+        seed=None if seed is None else seed + island,
+    )
+    game = FlappyGame(headless=True, maxFrames=options["maxFrames"])
+    nMigrants = min(options["migrants"], population.eliteCount)
+
+    sock = connect(address)
+    try:
+        # the coordinator checks that every island runs the same ring
+        settings = {
+            "islands": islands,
+            "generations": options["generations"],
+            "migrateEvery": options["migrateEvery"],
+            "migrants": nMigrants,
+            "population": options["population"],
+            "agent": options["agent"],
+            "genomeSize": population.agentClass.GENOME_SIZE,
+        }
+        sendMessage(sock, {"type": "hello", "island": island, "settings": settings})
+        recvReply(sock)
+
+        fitness = None
+        for generation in range(options["generations"]):
+            # every island and generation flies a different course
+            courseSeed = None
+            if seed is not None:
+                courseSeed = seed + island + generation * islands
+            crashInfo = game.mainGame(
+                game.movementInfo, population.agents(), seed=courseSeed
+            )
+            fitness = crashInfo["fitness"]
+            print(
+                "island %d generation %d: best %.2f, mean %.2f"
+                % (island, generation, np.max(fitness), np.mean(fitness)),
+                flush=True,
+            )
+            population.evolve(fitness)
+
+            if nMigrants and (generation + 1) % options["migrateEvery"] == 0:
+                epoch = (generation + 1) // options["migrateEvery"]
+                sendMessage(
+                    sock,
+                    {"type": "migrants", "island": island, "epoch": epoch},
+                    population.genomes[:nMigrants],
+                )
+                _, migrants = recvReply(sock)
+                population.genomes[-nMigrants:] = migrants
+
+        # the first row is the best genome of the last evaluated generation
+        sendMessage(
+            sock,
+            {"type": "done", "island": island, "fitness": float(np.max(fitness))},
+            population.genomes[:1],
+        )
+    finally:
+        sock.close()
+
+
+parser = argparse.ArgumentParser(
+    description="Island model flappy bird evolution", parents=[gaParser]
+)
+parser.add_argument("--islands", type=int, default=4, help="number of islands")
+parser.add_argument(
+    "--serve",
+    default=None,
+    metavar="ADDRESS",
+    help="only run the coordinator on host:port, :port for every interface, or "
+    "a socket path",
+)
+parser.add_argument(
+    "--join",
+    default=None,
+    metavar="ADDRESS",
+    help="only run island --island, migrating through this coordinator",
+)
+parser.add_argument("--island", type=int, default=0, help="island number for --join")
+parser.add_argument(
+    "--migrate-every", type=int, default=5, help="generations between migrations"
+)
+parser.add_argument(
+    "--migrants", type=int, default=2, help="elites sent to the next island"
+)
+parser.add_argument(
+    "--output", default=None, help="save the best genome to this .npy file"
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.generations < 1:
+        parser.error("--generations must be at least 1")
+    if args.migrate_every < 1:
+        parser.error("--migrate-every must be at least 1")
+    if args.join is not None and not 0 <= args.island < args.islands:
+        parser.error("--island must be one of 0..%d" % (args.islands - 1))
+    options = {
+        "seed": args.seed,
+        "agent": args.agent,
+        "population": args.population,
+        "generations": args.generations,
+        "elite": args.elite,
+        "mutationRate": args.mutation_rate,
+        "maxFrames": args.max_frames,
+        "migrateEvery": args.migrate_every,
+        "migrants": args.migrants,
+    }
+
+    if args.join is not None:
+        try:
+            runIsland(args.join, args.island, args.islands, options)
+        except RuntimeError as error:
+            raise SystemExit("island %d stopped: %s" % (args.island, error))
+        raise SystemExit
+
+    tmpDir = None
+    address = args.serve
+    if address is None:
+        tmpDir = tempfile.mkdtemp()
+        address = os.path.join(tmpDir, "coordinator.sock")
+    coordinator = MigrationCoordinator(address, args.islands)
+    coordinator.start()
+
+    processes = []
+    if args.serve is None:
+        processes = [
+            multiprocessing.Process(
+                target=runIsland, args=(address, island, args.islands, options)
+            )
+            for island in range(args.islands)
+        ]
+        for process in processes:
+            process.start()
+
+    try:
+        # local islands are watched, so one that crashes fails the run
+        while True:
+            results = coordinator.wait(timeout=1)
+            if results is not None:
+                break
+            for island, process in enumerate(processes):
+                if process.exitcode not in (None, 0):
+                    coordinator.fail(
+                        "island %d exited with code %d" % (island, process.exitcode)
+                    )
+    finally:
+        coordinator.close()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        if tmpDir is not None:
+            os.rmdir(tmpDir)
+
+    island = max(results, key=lambda i: results[i][0])
+    fitness, genome = results[island]
+    print("best: island %d, fitness %.2f" % (island, fitness))
+    if args.output is not None:
+        np.save(args.output, genome[0])
@@ -0,0 +1,97 @@
+"""
+Append-only binary log of per generation statistics, readable while training
+"""
+
+import os
+
+import numpy as np
+
+# one fixed size record per generation, -1 marks a value that is unknown
+LOG_DTYPE = np.dtype(
+    [
+        ("generation", "<i4"),
+        ("seed", "<i8"),
+        ("best", "<f8"),
+        ("mean", "<f8"),
+        ("std", "<f8"),
+        ("min", "<f8"),
+        ("p10", "<f8"),
+        ("median", "<f8"),
+        ("p90", "<f8"),
+        ("bestScore", "<i4"),
+        # summed over the courses of the generation, see --courses
+        ("frames", "<i4"),
+        ("evaluateSec", "<f8"),
+        ("evolveSec", "<f8"),
+    ]
+)
+
+
+class GenerationLog:
+    """appends one LOG_DTYPE record per generation to a raw binary file
+
+    Records are written whole and flushed, so read() can memory-map the file
+    from another process at any time and sees every finished generation.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "ab")
+        # drop a record torn by a crash, later records must stay aligned
+        complete = self.file.tell() // LOG_DTYPE.itemsize * LOG_DTYPE.itemsize
+        if complete != self.file.tell():
+            self.file.truncate(complete)
+
+    def append(
+        self,
+        generation,
+        seed,
+        fitness,
+        bestScore=-1,
+        frames=-1,
+        evaluateSec=-1.0,
+        evolveSec=-1.0,
+    ):
+        fitness = np.asarray(fitness, dtype=float)
+        p10, median, p90 = np.percentile(fitness, [10, 50, 90])
+        record = np.array(
+            [
+                (
+                    generation,
+                    -1 if seed is None else seed,
+                    fitness.max(),
+                    fitness.mean(),
+                    fitness.std(),
+                    fitness.min(),
+                    p10,
+                    median,
+                    p90,
+                    bestScore,
+                    frames,
+                    evaluateSec,
+                    evolveSec,
+                )
+            ],
+            dtype=LOG_DTYPE,
+        )
+        self.file.write(record.tobytes())
+        self.file.flush()
+
+    def truncate(self, generation):
+        """drops the records of generation and later ones, e.g. on resume"""
+        records = self.read(self.path)
+        keep = np.count_nonzero(records["generation"] < generation)
+        del records
+        self.file.truncate(keep * LOG_DTYPE.itemsize)
+        self.file.seek(0, os.SEEK_END)
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def read(path):
+        """memory-maps the finished records of a log, read-only"""
+        count = os.path.getsize(path) // LOG_DTYPE.itemsize
+        if not count:
+            return np.zeros(0, dtype=LOG_DTYPE)
+        return np.memmap(path, dtype=LOG_DTYPE, mode="r", shape=(count,))
@@ -0,0 +1,37 @@
+"""
+Command line options shared by the training scripts
+"""
+
+import argparse
+
+from agents.neural import NeuralAgent
+from agents.random import RandomAgent
+
+AGENTS = {"neural": NeuralAgent, "random": RandomAgent}
+
+# GA and game options, add it with ArgumentParser(parents=[gaParser])
+gaParser = argparse.ArgumentParser(add_help=False)
+gaParser.add_argument(
+    "--seed", type=int, default=None, help="seed for the GA and the pipe courses"
+)
+gaParser.add_argument(
+    "--agent", choices=sorted(AGENTS), default="neural", help="agent to evolve"
+)
+gaParser.add_argument(
+    "--population", type=int, default=36, help="agents per population"
+)
+gaParser.add_argument(
+    "--generations",
+    type=int,
+    default=10,
+    help="generations to run, counting those of a resumed checkpoint",
+)
+gaParser.add_argument(
+    "--elite", type=float, default=0.1, help="fraction of agents kept unchanged"
+)
+gaParser.add_argument(
+    "--mutation-rate", type=float, default=0.1, help="chance to mutate each gene"
+)
+gaParser.add_argument(
+    "--max-frames", type=int, default=10000, help="end a generation after this"
+)
@@ -0,0 +1,115 @@
+"""
+Parallel fitness evaluation, sharding a population over a process pool
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from flappy_course import PipeCourse
+from flappy_game import FlappyGame
+from flappy_replay import Replay
+
+# headless game owned by each worker process, built once by initWorker
+workerGame = None
+
+
+def initWorker(gameOptions):
+    global workerGame
+    workerGame = FlappyGame(headless=True, **gameOptions)
+
+
+def evaluateShard(agents, courseHandle, record, snapshot=None):
+    """plays one shard of a population on a course shared by the parent
+
+    Returns the fitness and scores of the shard, its frame count and its
+    Replay, None unless recorded.
+    """
+    course = PipeCourse.attach(courseHandle)
+    try:
+        crashInfo = workerGame.mainGame(
+            workerGame.movementInfo,
+            agents,
+            course=course,
+            record=record,
+            snapshot=snapshot,
+        )
+    finally:
+        course.close()
+    return (
+        crashInfo["fitness"],
+        crashInfo["scores"],
+        crashInfo["frames"],
+        crashInfo.get("replay"),
+    )
+
+
+class ParallelEvaluator:
+    """evaluates populations across CPU cores, one headless game per worker
+
+    gameOptions are passed on to every worker's FlappyGame, e.g. maxFrames.
+    The scores and longest frame count of the last population are kept in
+    scores and frames, a recording evaluator also keeps its Replay in replay.
+    """
+
+    def __init__(self, workers=None, record=False, **gameOptions):
+        self.workers = workers or os.cpu_count()
+        self.record = record
+        self.scores, self.frames, self.replay = [], 0, None
+        # generates the courses, with the same rules as the workers
+        self.game = FlappyGame(headless=True, **gameOptions)
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=initWorker, initargs=(gameOptions,)
+        )
+
+    def evaluate(self, agents, seed=None, snapshot=None):
+        """returns the fitness of every agent, in order
+
+        All shards fly the same course so their fitness stays comparable. It
+        is generated once here and read by the workers from shared memory, a
+        random seed is drawn when none is given. A WorldSnapshot starts every
+        agent from its state on its course instead.
+        """
+        course = self.game.getCourse(seed) if snapshot is None else snapshot.course()
+        block, handle = course.share()
+        try:
+            shards = [
+                shard
+                for shard in np.array_split(np.arange(len(agents)), self.workers)
+                if len(shard)
+            ]
+            futures = [
+                self.pool.submit(
+                    evaluateShard,
+                    [agents[i] for i in shard],
+                    handle,
+                    self.record,
+                    snapshot,
+                )
+                for shard in shards
+            ]
+
+            fitness, scores, frames, replays = [], [], 0, []
+            for future in futures:
+                shardFitness, shardScores, shardFrames, replay = future.result()
+                fitness.extend(shardFitness)
+                scores.extend(shardScores)
+                frames = max(frames, shardFrames)
+                replays.append(replay)
+        finally:
+            block.close()
+            block.unlink()
+        self.scores, self.frames = scores, frames
+        if self.record:
+            self.replay = Replay.concatenate(replays)
+        return fitness
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
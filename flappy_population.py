@@ -0,0 +1,119 @@
+"""
+Genetic algorithm over a population whose genomes share one NumPy matrix
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+class Population:
+    """one generation of agents, evolved with elitism, crossover and mutation"""
+
+    def __init__(
+        self,
+        agentClass,
+        size,
+        eliteFraction=0.1,
+        tournamentSize=3,
+        mutationRate=0.1,
+        mutationScale=None,
+        seed=None,
+    ):
+        self.agentClass = agentClass
+        self.size = size
+        self.eliteCount = max(1, int(round(size * eliteFraction)))
+        self.tournamentSize = tournamentSize
+        self.mutationRate = mutationRate
+        self.mutationScale = (
+            agentClass.MUTATION_SCALE if mutationScale is None else mutationScale
+        )
+        self.rng = np.random.default_rng(seed)
+        self.generation = 0
+        # one row per agent, contiguous so every GA step is a matrix operation
+        self.genomes = np.ascontiguousarray(
+            agentClass.random_genomes(size, self.rng), dtype=float
+        )
+
+    def agents(self):
+        """returns one agent per genome row, sharing the row's memory"""
+        return [self.agentClass.from_genome(genome) for genome in self.genomes]
+
+    def select(self, fitness, n):
+        """picks n parents by tournament, returning their genome rows"""
+        contestants = self.rng.integers(self.size, size=(n, self.tournamentSize))
+        winners = np.argmax(fitness[contestants], axis=1)
+        return contestants[np.arange(n), winners]
+
+    def evolve(self, fitness):
+        """replaces the genomes with the next generation bred from fitness
+
+        The elites are carried over unchanged as the first rows, ordered from
+        best to worst, the remaining rows are mutated children.
+        """
+        fitness = np.asarray(fitness, dtype=float)
+        if len(fitness) != self.size:
+            raise ValueError(
+                "expected %d fitness values, got %d" % (self.size, len(fitness))
+            )
+
+        order = np.argsort(-fitness, kind="stable")
+        elites = self.genomes[order[: self.eliteCount]]
+
+        nChildren = self.size - self.eliteCount
+        parentsA = self.genomes[self.select(fitness, nChildren)]
+        parentsB = self.genomes[self.select(fitness, nChildren)]
+        children = self.agentClass.breed_batch(parentsA, parentsB, self.rng)
+        children = self.agentClass.mutate_batch(
+            children, self.rng, self.mutationRate, self.mutationScale
+        )
+
+        self.genomes = np.concatenate([elites, children])
+        self.generation += 1
+        return self.genomes
+
+    def save(self, path):
+        """checkpoints genomes, GA settings and RNG state to an .npz file
+
+        The file is written next to path and renamed over it once it is on
+        disk, so a crash mid write leaves the previous checkpoint intact.
+        """
+        tmpPath = path + ".tmp"
+        with open(tmpPath, "wb") as f:
+            np.savez(
+                f,
+                agentClass=np.array(self.agentClass.__name__),
+                genomes=self.genomes,
+                generation=self.generation,
+                eliteCount=self.eliteCount,
+                tournamentSize=self.tournamentSize,
+                mutationRate=self.mutationRate,
+                mutationScale=self.mutationScale,
+                rngState=np.array(json.dumps(self.rng.bit_generator.state)),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, path)
+
+    @classmethod
+    def load(cls, path, agentClass):
+        """resumes a population checkpointed by save"""
+        with np.load(path) as f:
+            if str(f["agentClass"]) != agentClass.__name__:
+                raise ValueError(
+                    "checkpoint holds %s genomes, not %s"
+                    % (f["agentClass"], agentClass.__name__)
+                )
+            population = cls.__new__(cls)
+            population.agentClass = agentClass
+            population.genomes = f["genomes"]
+            population.size = len(population.genomes)
+            population.generation = int(f["generation"])
+            population.eliteCount = int(f["eliteCount"])
+            population.tournamentSize = int(f["tournamentSize"])
+            population.mutationRate = float(f["mutationRate"])
+            population.mutationScale = float(f["mutationScale"])
+            population.rng = np.random.default_rng()
+            population.rng.bit_generator.state = json.loads(str(f["rngState"]))
+        return population
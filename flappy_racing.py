@@ -0,0 +1,109 @@
+"""
+Fitness over several courses, racing agents so losers stop early
+"""
+
+import numpy as np
+
+
+class RaceResult:
+    """mean fitness of every agent over the courses it flew
+
+    Agents dropped early flew fewer courses. fitness ranks agents by the
+    number of courses survived first and mean second, so it can be handed
+    to Population.evolve without an early loser beating a finalist.
+    """
+
+    def __init__(self, mean, stderr, courses):
+        self.mean = mean
+        self.stderr = stderr
+        self.courses = courses
+
+    @property
+    def fitness(self):
+        order = np.lexsort((self.mean, self.courses))
+        ranks = np.empty(len(order))
+        ranks[order] = np.arange(len(order))
+        return ranks
+
+    def best(self):
+        return int(np.argmax(self.fitness))
+
+    def __str__(self):
+        best = self.best()
+        return "%.2f +- %.2f over %d courses, %d agent-courses flown" % (
+            self.mean[best],
+            self.stderr[best],
+            self.courses[best],
+            self.courses.sum(),
+        )
+
+
+class RacingEvaluator:
+    """successive halving over a list of course seeds
+
+    Every agent flies the first minCourses courses. After that each round
+    keeps the best keepFraction of the contenders by mean fitness, plus any
+    agent not clearly worse than the last one kept: its mean plus z
+    standard errors still reaches it. Survivors fly the next course, until
+    the courses run out or minSurvivors remain.
+
+    evaluate(agents, seed) must return the fitness list of the agents it is
+    given, e.g. ParallelEvaluator.evaluate or FitnessCache.evaluate.
+    """
+
+    def __init__(
+        self, evaluate, keepFraction=0.5, minCourses=2, z=2.0, minSurvivors=1
+    ):
+        self.evaluate = evaluate
+        self.keepFraction = keepFraction
+        self.minCourses = minCourses
+        self.z = z
+        self.minSurvivors = minSurvivors
+
+    def race(self, agents, seeds):
+        """returns the RaceResult of agents over the courses drawn from seeds"""
+        n = len(agents)
+        total = np.zeros(n)
+        totalSq = np.zeros(n)
+        courses = np.zeros(n, dtype=int)
+        contenders = np.arange(n)
+
+        for k, seed in enumerate(seeds):
+            fitness = np.asarray(
+                self.evaluate([agents[i] for i in contenders], seed), dtype=float
+            )
+            total[contenders] += fitness
+            totalSq[contenders] += fitness**2
+            courses[contenders] += 1
+
+            if k + 1 < self.minCourses or k + 1 == len(seeds):
+                continue
+            contenders = self.survivors(contenders, total, totalSq, courses)
+            if len(contenders) <= self.minSurvivors:
+                break
+
+        mean, stderr = self.summarize(total, totalSq, courses)
+        return RaceResult(mean, stderr, courses)
+
+    def survivors(self, contenders, total, totalSq, courses):
+        """returns the contenders that fly on, in agent order"""
+        mean, stderr = self.summarize(
+            total[contenders], totalSq[contenders], courses[contenders]
+        )
+        keep = int(np.ceil(len(contenders) * self.keepFraction))
+        keep = min(len(contenders), max(self.minSurvivors, keep))
+        order = np.argsort(-mean, kind="stable")
+        cutoff = mean[order[keep - 1]]
+        survive = np.zeros(len(contenders), dtype=bool)
+        survive[order[:keep]] = True
+        survive |= mean + self.z * stderr >= cutoff
+        return contenders[survive]
+
+    @staticmethod
+    def summarize(total, totalSq, courses):
+        """returns the mean and its standard error, infinite after one course"""
+        mean = total / courses
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = np.maximum(totalSq - courses * mean**2, 0) / (courses - 1)
+            stderr = np.where(courses > 1, np.sqrt(variance / courses), np.inf)
+        return mean, stderr
@@ -0,0 +1,201 @@
+"""
+Bit-packed recordings of every bird's jumps, replayed without their agents
+"""
+
+import argparse
+
+import numpy as np
+
+from flappy_course import PipeCourse
+from flappy_sim import PopulationSim
+
+
+class ReplayRecorder:
+    """collects the jump decision of every bird, one bit per bird and frame"""
+
+    def __init__(self, nAgents):
+        self.nAgents = nAgents
+        self.rows = []
+        self.jumpRow = np.zeros(nAgents, dtype=bool)
+        # last frame each bird was stepped in, its crash or the final frame
+        self.endFrames = np.zeros(nAgents, dtype=np.int32)
+
+    def record(self, live, jumps):
+        """stores the jumps of the live birds in the frame being stepped"""
+        self.jumpRow[:] = False
+        self.jumpRow[live[jumps]] = True
+        self.endFrames[live] = len(self.rows)
+        self.rows.append(np.packbits(self.jumpRow))
+
+    def finish(self, sim, movementInfo):
+        """returns the Replay of a finished generation"""
+        if self.rows:
+            decisions = np.stack(self.rows)
+        else:
+            decisions = np.zeros((0, (self.nAgents + 7) // 8), dtype=np.uint8)
+        return Replay(
+            decisions,
+            self.endFrames.copy(),
+            sim.playerFitness.copy(),
+            sim.course.seed,
+            sim.course.gapOffset,
+            sim.course.gapRange,
+            movementInfo["playery"],
+            movementInfo["basex"],
+        )
+
+
+class Replay:
+    """the jumps of every bird of a generation and the course they flew
+
+    decisions holds a row of packed bits per frame, bird i jumped in frame f
+    when bit i of decisions[f] is set. Together with the course seed and the
+    start position this is enough to fly every bird again.
+    """
+
+    def __init__(
+        self, decisions, endFrames, fitness, seed, gapOffset, gapRange, playery, basex
+    ):
+        self.decisions = decisions
+        self.endFrames = endFrames
+        self.fitness = fitness
+        self.seed = seed
+        self.gapOffset = gapOffset
+        self.gapRange = gapRange
+        self.playery = playery
+        self.basex = basex
+
+    def __len__(self):
+        return len(self.endFrames)
+
+    @property
+    def frames(self):
+        return len(self.decisions)
+
+    def best(self, n=1):
+        """returns the indices of the n fittest birds, best first"""
+        return np.argsort(-self.fitness, kind="stable")[:n]
+
+    def jumps(self, birds):
+        """returns a frames x len(birds) bool array of the birds' jumps"""
+        bits = np.unpackbits(self.decisions, axis=1, count=len(self))
+        return bits[:, birds].astype(bool)
+
+    def course(self):
+        # a new pipe enters at most every 30 frames
+        length = self.frames // 30 + 4
+        return PipeCourse.generate(self.seed, length, self.gapOffset, self.gapRange)
+
+    @property
+    def movementInfo(self):
+        return {"playery": self.playery, "basex": self.basex}
+
+    @classmethod
+    def concatenate(cls, replays):
+        """joins replays of shards of one population on the same course"""
+        frames = max(replay.frames for replay in replays)
+        jumps = [
+            np.pad(replay.jumps(slice(None)), ((0, frames - replay.frames), (0, 0)))
+            for replay in replays
+        ]
+        first = replays[0]
+        return cls(
+            np.packbits(np.concatenate(jumps, axis=1), axis=1),
+            np.concatenate([replay.endFrames for replay in replays]),
+            np.concatenate([replay.fitness for replay in replays]),
+            first.seed,
+            first.gapOffset,
+            first.gapRange,
+            first.playery,
+            first.basex,
+        )
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            decisions=self.decisions,
+            endFrames=self.endFrames,
+            fitness=self.fitness,
+            seed=self.seed,
+            gapOffset=self.gapOffset,
+            gapRange=self.gapRange,
+            start=np.array([self.playery, self.basex]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            playery, basex = f["start"].tolist()
+            return cls(
+                f["decisions"],
+                f["endFrames"],
+                f["fitness"],
+                int(f["seed"]),
+                int(f["gapOffset"]),
+                int(f["gapRange"]),
+                playery,
+                basex,
+            )
+
+
+class ReplaySim(PopulationSim):
+    """flies recorded birds again, taking their jumps from a Replay
+
+    Bird i of the simulation is replay bird birds[i]. A bird leaves the
+    simulation after its last recorded frame, so a run ended by a limit of
+    the recording game ends at the same frame here. The limits of the
+    replaying game are ignored, they depend on the birds left out.
+    """
+
+    def __init__(self, game, replay, birds, stats=None):
+        self.jumpBits = replay.jumps(birds)
+        self.endFrames = replay.endFrames[birds]
+        super().__init__(
+            game,
+            [None] * len(self.endFrames),
+            replay.movementInfo,
+            stats=stats,
+            course=replay.course(),
+        )
+
+    def stackBatch(self, agentClass, idx):
+        return agentClass, None, idx
+
+    def decide(self):
+        if self.frame >= len(self.jumpBits):
+            return np.zeros(len(self.live), dtype=bool)
+        return self.jumpBits[self.frame, self.live]
+
+    def limitReached(self, live):
+        return False
+
+    def step(self):
+        super().step()
+        if self.done:
+            return
+        over = self.live[self.endFrames[self.live] < self.frame]
+        if len(over):
+            self.retire(over)
+            if not len(self.live):
+                self.end(over[-1], False, truncated=True)
+
+
+parser = argparse.ArgumentParser(description="Replay recorded flappy bird runs")
+parser.add_argument("path", help="replay file written with --record-dir")
+parser.add_argument(
+    "--birds", type=int, nargs="+", default=None, help="birds to show, default the best"
+)
+parser.add_argument("--speed", type=float, default=1, help="playback speed factor")
+parser.add_argument(
+    "--top-k", type=int, default=None, help="draw only the first k live birds"
+)
+
+if __name__ == "__main__":
+    from flappy_game import FlappyGame
+
+    args = parser.parse_args()
+    replay = Replay.load(args.path)
+    birds = replay.best() if args.birds is None else args.birds
+    game = FlappyGame(audio=args.speed == 1)
+    crashInfo = game.replay(replay, birds, speed=args.speed, topK=args.top_k)
+    game.showGameOverScreen(crashInfo)
@@ -0,0 +1,346 @@
+"""
+Vectorized flappy bird physics, stepping a whole population at once
+"""
+
+import numpy as np
+
+from flappy_snapshot import WorldSnapshot
+
+
+class PopulationSim:
+    """advances every bird of a population through one shared pipe course"""
+
+    PLAYERMAXVELY = 10  # max vel along Y, max descend speed
+    PLAYERACCY = 1  # players downward acceleration
+    PLAYERVELROT = 3  # angular speed
+    PLAYERROTTHR = 20  # rotation threshold
+    PLAYERFLAPACC = -9  # players speed on flapping
+    PLAYERINDEXCYCLE = (0, 1, 2, 1)  # order of the flap animation frames
+
+    def __init__(
+        self,
+        game,
+        agents,
+        movementInfo,
+        seed=None,
+        stats=None,
+        course=None,
+        recorder=None,
+        snapshot=None,
+    ):
+        self.game = game
+        self.agents = agents
+        # optional GenerationStats, timing the phases of every step
+        self.stats = stats
+        # optional ReplayRecorder, storing the jumps of every step
+        self.recorder = recorder
+        n_agents = len(agents)
+
+        # gap heights of every pipe, drawn from seed unless a course is given
+        if course is None:
+            course = game.getCourse(seed) if snapshot is None else snapshot.course()
+        self.course = course
+        # restart the flap animation so hitmasks line up identically every run
+        self.animation = self.playerIndex = self.loopIter = 0
+        self.frame = 0
+
+        self.playerx = int(game.SCREENWIDTH * 0.2)
+        self.playerW = game.PLAYERWIDTH
+        self.playerH = game.PLAYERHEIGHT
+        self.pipeW = game.PIPEWIDTH
+
+        self.basex = movementInfo["basex"]
+        self.baseShift = game.BASESHIFT
+
+        # fixed logical timestep, so machine load never changes the physics
+        dt = 1 / game.FPS
+        self.pipeVelX = -128 * dt
+
+        # x and gap height of the pipes on screen, the first 3 of the course
+        self.pipeX = [
+            (game.SCREENWIDTH / 2) + 200,
+            game.SCREENWIDTH + 200,
+            game.SCREENWIDTH + 200 + (game.SCREENWIDTH / 2),
+        ]
+        self.pipeGapY = [self.course.gap(k) for k in range(3)]
+        self.nextPipeNumber = 3
+
+        # per bird state, one entry per agent
+        self.playery = np.full(n_agents, movementInfo["playery"], dtype=float)
+        self.playerVelY = np.full(n_agents, self.PLAYERFLAPACC, dtype=int)
+        self.playerRot = np.full(n_agents, 45, dtype=int)
+        self.playerFitness = np.zeros(n_agents)
+        self.playerAlive = np.ones(n_agents, dtype=bool)
+        self.score = np.zeros(n_agents, dtype=int)
+        if snapshot is not None:
+            self.restore(snapshot)
+
+        # compacted, ascending indices of the birds still alive, so work per
+        # frame scales with the survivors rather than the population
+        self.live = np.arange(n_agents)
+        self.lastDeathFrame = self.frame
+
+        # live birds that flapped and number of pipes passed in the last step
+        self.flapped = np.zeros(n_agents, dtype=bool)
+        self.scored = 0
+        self.crashInfo = None
+
+        # agents of the same class decide together through predict_jump_batch
+        self.jumpScratch = np.zeros(n_agents, dtype=bool)
+        self.batches = []
+        for agentClass in dict.fromkeys(type(agent) for agent in agents):
+            idx = np.array(
+                [i for i, agent in enumerate(agents) if type(agent) is agentClass]
+            )
+            self.batches.append(self.stackBatch(agentClass, idx))
+
+    @property
+    def done(self):
+        return self.crashInfo is not None
+
+    def stackBatch(self, agentClass, idx):
+        return agentClass, agentClass.stack([self.agents[i] for i in idx]), idx
+
+    def retire(self, dead):
+        """drops dead birds from the live set and re-stacks shrunken batches
+
+        A batch keeps predicting for its dead members until fewer than half of
+        them are alive, which keeps re-stacking cheap while bounding the waste.
+        """
+        self.playerAlive[dead] = False
+        self.live = self.live[self.playerAlive[self.live]]
+        self.lastDeathFrame = self.frame
+
+        batches = []
+        for agentClass, batch, idx in self.batches:
+            alive = idx[self.playerAlive[idx]]
+            if not len(alive):
+                continue
+            if 2 * len(alive) < len(idx):
+                batches.append(self.stackBatch(agentClass, alive))
+            else:
+                batches.append((agentClass, batch, idx))
+        self.batches = batches
+
+    @property
+    def upperY(self):
+        return [gapY - self.game.PIPEHEIGHT for gapY in self.pipeGapY]
+
+    @property
+    def lowerY(self):
+        return [gapY + self.game.PIPEGAPSIZE for gapY in self.pipeGapY]
+
+    @property
+    def upperPipes(self):
+        return [{"x": x, "y": y} for x, y in zip(self.pipeX, self.upperY)]
+
+    @property
+    def lowerPipes(self):
+        return [{"x": x, "y": y} for x, y in zip(self.pipeX, self.lowerY)]
+
+    def aim(self):
+        """finds the pipe targets once per frame, they are the same for every bird"""
+        nextX = next(x for x in self.pipeX if x > self.playerx)
+        self.horizontal = nextX - self.playerx
+        self.holeY = (self.upperY[0] + self.lowerY[0]) / 2
+
+    def observe(self, birds):
+        """returns horizontal and vertical distances to the next gap per bird"""
+        horizontal = np.full(len(birds), self.horizontal)
+        vertical = self.holeY - self.playery[birds]
+        return horizontal, vertical
+
+    def decide(self):
+        """asks every agent batch whether its live birds jump this frame"""
+        for agentClass, batch, idx in self.batches:
+            horizontal, vertical = self.observe(idx)
+            self.jumpScratch[idx] = agentClass.predict_jump_batch(
+                batch,
+                horizontal,
+                vertical,
+                velocity_y=self.playerVelY[idx],
+            )
+        return self.jumpScratch[self.live]
+
+    def step(self):
+        """advances the population one frame, filling crashInfo once it ended"""
+        stats = self.stats
+        live = self.live
+        self.aim()
+        jumps = self.decide()
+        if self.recorder is not None:
+            self.recorder.record(live, jumps)
+        _, vertical = self.observe(live)
+        if stats is not None:
+            stats.lap("decide")
+            stats.count("flaps", np.count_nonzero(jumps))
+
+        self.flapped = jumps
+        self.playerVelY[live[jumps]] = self.PLAYERFLAPACC
+
+        # increase fitness
+        self.playerFitness[live] += 1
+        if stats is not None:
+            stats.lap("physics")
+
+        # check for crash here
+        crashed, groundCrash = self.checkCrash(live)
+        if stats is not None:
+            stats.lap("collision")
+        if crashed.any():
+            dead = live[crashed]
+            if stats is not None:
+                stats.count("crashes", len(dead))
+            # Add distance to vertical hole to fitness for hot start, a bird
+            # dead level with the hole gets the one pixel bonus instead of 1 / 0
+            distance = np.abs(vertical[crashed])
+            distance[distance == 0] = 1
+            self.playerFitness[dead] += 1 / distance
+            self.retire(dead)
+
+            if not len(self.live):
+                self.end(dead[-1], bool(groundCrash[crashed][-1]))
+                return
+            survived = ~crashed
+            live, jumps = live[survived], jumps[survived]
+
+        # check for score, every bird shares the same x
+        playerMidPos = self.playerx + self.playerW / 2
+        self.scored = 0
+        for pipeX in self.pipeX:
+            pipeMidPos = pipeX + self.pipeW / 2
+            if pipeMidPos <= playerMidPos < pipeMidPos + 6:
+                self.scored += 1
+        if self.scored:
+            self.score[live] += self.scored
+            if stats is not None:
+                stats.count("scores", self.scored * len(live))
+
+        # rotate the player
+        rot = self.playerRot[live]
+        rot[rot > -90] -= self.PLAYERVELROT
+
+        # player's movement
+        velY = self.playerVelY[live]
+        velY[(velY < self.PLAYERMAXVELY) & ~jumps] += self.PLAYERACCY
+        # more rotation to cover the threshold (calculated in visible rotation)
+        rot[jumps] = 45
+        self.playerRot[live] = rot
+        self.playerVelY[live] = velY
+
+        playery = self.playery[live]
+        self.playery[live] = playery + np.minimum(
+            velY, self.game.BASEY - playery - self.playerH
+        )
+        if stats is not None:
+            stats.lap("physics")
+
+        self.advanceWorld()
+        if stats is not None:
+            stats.lap("pipes")
+
+        if self.limitReached(live):
+            self.end(live[0], False, truncated=True)
+
+    def limitReached(self, live):
+        """generation limits, so a near perfect population can not run forever"""
+        game = self.game
+        return (
+            (game.MAXFRAMES is not None and self.frame >= game.MAXFRAMES)
+            or (game.MAXSCORE is not None and self.score[live].max() >= game.MAXSCORE)
+            or (
+                game.STAGNATIONFRAMES is not None
+                and self.frame - self.lastDeathFrame >= game.STAGNATIONFRAMES
+            )
+        )
+
+    def end(self, bird, groundCrash, truncated=False):
+        """fills crashInfo, describing the given bird for the game over screen"""
+        self.crashInfo = {
+            "y": self.playery[bird],
+            "groundCrash": groundCrash,
+            "basex": self.basex,
+            "upperPipes": self.upperPipes,
+            "lowerPipes": self.lowerPipes,
+            "score": int(self.score[bird]),
+            "playerVelY": int(self.playerVelY[bird]),
+            "playerRot": int(self.playerRot[bird]),
+            "fitness": self.playerFitness.tolist(),
+            "scores": self.score.tolist(),
+            "frames": self.frame,
+            # True when a limit ended the generation with birds still alive
+            "truncated": truncated,
+        }
+
+    def checkCrash(self, live):
+        """returns crashed and groundCrash flags for the given birds"""
+        return self.game.COLLIDER.checkCrash(
+            self.playerx,
+            self.playery[live],
+            self.playerIndex,
+            self.pipeX,
+            self.upperY,
+            self.lowerY,
+        )
+
+    def advanceWorld(self):
+        """moves the base and pipes and spawns or removes pipes"""
+        # playerIndex basex change
+        if (self.loopIter + 1) % 3 == 0:
+            self.playerIndex = self.PLAYERINDEXCYCLE[self.animation]
+            self.animation = (self.animation + 1) % len(self.PLAYERINDEXCYCLE)
+        self.loopIter = (self.loopIter + 1) % 30
+        self.basex = -((-self.basex + 100) % self.baseShift)
+        self.frame += 1
+
+        # move pipes to left
+        self.pipeX = [x + self.pipeVelX for x in self.pipeX]
+
+        # add new pipe when first pipe is about to touch left of screen
+        if 3 > len(self.pipeX) > 0 and 0 < self.pipeX[0] < 5:
+            self.pipeX.append(self.game.SCREENWIDTH + 10)
+            self.pipeGapY.append(self.course.gap(self.nextPipeNumber))
+            self.nextPipeNumber += 1
+
+        # remove first pipe if its out of the screen
+        if len(self.pipeX) > 0 and self.pipeX[0] < -self.pipeW:
+            self.pipeX.pop(0)
+            self.pipeGapY.pop(0)
+
+    def snapshot(self, bird):
+        """returns a WorldSnapshot of the world and of one bird's state"""
+        return WorldSnapshot(
+            seed=self.course.seed,
+            gapOffset=self.course.gapOffset,
+            gapRange=self.course.gapRange,
+            frame=self.frame,
+            loopIter=self.loopIter,
+            animation=self.animation,
+            playerIndex=self.playerIndex,
+            basex=self.basex,
+            pipeX=list(self.pipeX),
+            pipeGapY=list(self.pipeGapY),
+            nextPipeNumber=self.nextPipeNumber,
+            playery=float(self.playery[bird]),
+            playerVelY=int(self.playerVelY[bird]),
+            playerRot=int(self.playerRot[bird]),
+            score=int(self.score[bird]),
+        )
+
+    def restore(self, snapshot):
+        """puts the world and every bird in the state of a WorldSnapshot
+
+        Fitness still starts at zero, it counts the frames flown from there.
+        """
+        self.frame = snapshot.frame
+        self.loopIter = snapshot.loopIter
+        self.animation = snapshot.animation
+        self.playerIndex = snapshot.playerIndex
+        self.basex = snapshot.basex
+        self.pipeX = list(snapshot.pipeX)
+        self.pipeGapY = list(snapshot.pipeGapY)
+        self.nextPipeNumber = snapshot.nextPipeNumber
+        self.playery[:] = snapshot.playery
+        self.playerVelY[:] = snapshot.playerVelY
+        self.playerRot[:] = snapshot.playerRot
+        self.score[:] = snapshot.score
@@ -0,0 +1,96 @@
+"""
+Snapshots of a running world, so evaluations can start mid-course
+"""
+
+import os
+import pickle
+
+from flappy_course import PipeCourse
+
+
+class WorldSnapshot:
+    """the pipes, counters and one bird's state at a frame of a course
+
+    The course is stored as its seed, with the pipes already on screen and
+    the number of the next one, which is all the randomness a world has.
+    """
+
+    FIELDS = (
+        "seed",
+        "gapOffset",
+        "gapRange",
+        "frame",
+        "loopIter",
+        "animation",
+        "playerIndex",
+        "basex",
+        "pipeX",
+        "pipeGapY",
+        "nextPipeNumber",
+        "playery",
+        "playerVelY",
+        "playerRot",
+        "score",
+    )
+
+    def __init__(self, **fields):
+        missing = set(self.FIELDS) - set(fields)
+        if missing:
+            raise TypeError("missing snapshot fields: %s" % ", ".join(sorted(missing)))
+        for name in self.FIELDS:
+            setattr(self, name, fields[name])
+
+    def course(self):
+        return PipeCourse.generate(
+            self.seed, self.nextPipeNumber + 64, self.gapOffset, self.gapRange
+        )
+
+    def __repr__(self):
+        return "WorldSnapshot(seed=%d, frame=%d, score=%d)" % (
+            self.seed,
+            self.frame,
+            self.score,
+        )
+
+
+class SnapshotLibrary:
+    """a curriculum of snapshots to start evaluations from
+
+    pick() walks through the snapshots in the order they were added, so a
+    library filled from easy to hard sections is a curriculum schedule,
+    sample() draws one uniformly instead.
+    """
+
+    def __init__(self, snapshots=()):
+        self.snapshots = list(snapshots)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def add(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    def pick(self, generation, every=1):
+        """returns the snapshot of a generation, moving on every N generations"""
+        return self.snapshots[(generation // every) % len(self.snapshots)]
+
+    def sample(self, rng):
+        return self.snapshots[rng.integers(len(self.snapshots))]
+
+    def save(self, path):
+        """writes the library to path, atomically replacing an older file"""
+        tmpPath = path + ".tmp"
+        with open(tmpPath, "wb") as f:
+            pickle.dump(
+                [
+                    {name: getattr(snapshot, name) for name in WorldSnapshot.FIELDS}
+                    for snapshot in self.snapshots
+                ],
+                f,
+            )
+        os.replace(tmpPath, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(WorldSnapshot(**fields) for fields in pickle.load(f))
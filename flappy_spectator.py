@@ -0,0 +1,34 @@
+"""
+Spectator policy, choosing which generations are drawn while training
+"""
+
+
+class Spectator:
+    """renders every Nth generation and the generation after a new best
+
+    A new best is only known once its generation has been simulated, the
+    following generation is drawn instead, where the elites carried over by
+    Population fly first. Only the first topK live birds are drawn. Agents
+    answered from a FitnessCache are not simulated, so with a cache the
+    elites are usually missing and the first birds drawn are children.
+    """
+
+    def __init__(self, every=None, onNewBest=False, topK=None, gameOverScreen=True):
+        self.every = every
+        self.onNewBest = onNewBest
+        self.topK = topK
+        self.gameOverScreen = gameOverScreen
+        self.best = None
+        self.newBest = False
+
+    def shouldRender(self, generation):
+        if self.every is not None and generation % self.every == 0:
+            return True
+        return self.newBest
+
+    def update(self, fitness):
+        """records the fitness of a finished generation"""
+        best = max(fitness)
+        self.newBest = self.onNewBest and (self.best is None or best > self.best)
+        if self.best is None or best > self.best:
+            self.best = best
@@ -0,0 +1,48 @@
+"""
+Per generation phase timings and event counts of the game loop
+"""
+
+from time import perf_counter
+
+
+class GenerationStats:
+    """time spent per phase of a frame and events counted over one generation
+
+    Phases are timed with lap(), which books the time since the previous lap
+    on the named phase, so a frame is covered without gaps.
+    """
+
+    PHASES = ("events", "decide", "physics", "collision", "pipes", "render", "tick")
+    EVENTS = ("flaps", "crashes", "scores", "sounds")
+
+    def __init__(self):
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self.counts = dict.fromkeys(self.EVENTS, 0)
+        self.frames = 0
+        self.last = perf_counter()
+
+    def start(self):
+        """starts timing a new frame"""
+        self.frames += 1
+        self.last = perf_counter()
+
+    def lap(self, phase):
+        now = perf_counter()
+        self.times[phase] += now - self.last
+        self.last = now
+
+    def count(self, event, n=1):
+        self.counts[event] += n
+
+    def asDict(self):
+        return {"frames": self.frames, "times": self.times, "counts": self.counts}
+
+    def __str__(self):
+        total = sum(self.times.values()) or 1.0
+        phases = ", ".join(
+            "%s %.0f%%" % (phase, 100 * seconds / total)
+            for phase, seconds in self.times.items()
+            if seconds
+        )
+        counts = ", ".join("%s %d" % item for item in self.counts.items())
+        return "%d frames in %.3fs (%s), %s" % (self.frames, total, phases, counts)
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# sprites and sounds are loaded relative to the repository root
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from flappy_game import FlappyGame  # noqa: E402
+from flappy_population import Population  # noqa: E402
+from agents.neural import NeuralAgent  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def game():
+    return FlappyGame(headless=True, maxFrames=1000)
+
+
+@pytest.fixture
+def agents():
+    return Population(NeuralAgent, 60, seed=3).agents()
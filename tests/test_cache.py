@@ -0,0 +1,53 @@
+from flappy_cache import FitnessCache
+from agents.neural import NeuralAgent
+from agents.random import RandomAgent
+
+
+class CountingEvaluator:
+    """returns a fitness per agent and remembers how many agents it flew"""
+
+    def __init__(self):
+        self.flown = 0
+
+    def __call__(self, agents, seed):
+        self.flown += len(agents)
+        return [float(agent.genome.sum()) + seed for agent in agents]
+
+
+def test_evaluate_simulates_only_misses():
+    agents = [NeuralAgent() for _ in range(4)]
+    cache = FitnessCache(100)
+    evaluate = CountingEvaluator()
+
+    first = cache.evaluate(agents, 1, evaluate)
+    second = cache.evaluate(agents, 1, evaluate)
+    assert first == second
+    assert evaluate.flown == 4
+
+    cache.evaluate(agents, 2, evaluate)
+    assert evaluate.flown == 8
+
+
+def test_unseeded_and_random_agents_are_never_cached():
+    cache = FitnessCache(100)
+    assert cache.key(NeuralAgent(), None) is None
+    assert cache.key(RandomAgent(), 1) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = FitnessCache(2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    cache.get("a")
+    cache.put("c", 3.0)
+    assert list(cache.entries) == ["a", "c"]
+
+
+def test_file_written_under_another_tag_is_ignored(tmp_path):
+    path = str(tmp_path / "cache.pkl")
+    cache = FitnessCache(10, path=path, tag="maxFrames=100")
+    cache.put("a", 1.0)
+    cache.save()
+
+    assert FitnessCache(10, path=path, tag="maxFrames=100").get("a") == 1.0
+    assert FitnessCache(10, path=path, tag="maxFrames=200").get("a") is None
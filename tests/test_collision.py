@@ -0,0 +1,28 @@
+import numpy as np
+
+
+def test_bitmask_collider_matches_rect_check_crash(game):
+    rng = np.random.default_rng(0)
+    playerx = int(game.SCREENWIDTH * 0.2)
+    for _ in range(300):
+        # pipes around the bird's columns, birds anywhere from above the gap
+        # to the ground, so misses, grazes and hits all occur
+        pipeX = playerx + rng.uniform(-game.PIPEWIDTH - 5, game.PLAYERWIDTH + 5, 2)
+        pipeX[1] += 150
+        gapY = rng.integers(80, 250, 2)
+        upperPipes = [{"x": x, "y": y - game.PIPEHEIGHT} for x, y in zip(pipeX, gapY)]
+        lowerPipes = [{"x": x, "y": y + game.PIPEGAPSIZE} for x, y in zip(pipeX, gapY)]
+        playerIndex = int(rng.integers(3))
+        playery = rng.uniform(-30, game.BASEY, 20)
+
+        crashed, groundCrash = game.checkCrashBatch(
+            playerx, playery, playerIndex, upperPipes, lowerPipes
+        )
+        expected = [
+            game.checkCrash(
+                {"x": playerx, "y": y, "index": playerIndex}, upperPipes, lowerPipes
+            )
+            for y in playery
+        ]
+        assert crashed.tolist() == [crash for crash, _ in expected]
+        assert groundCrash.tolist() == [ground for _, ground in expected]
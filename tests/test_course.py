@@ -0,0 +1,23 @@
+from flappy_course import PipeCourse
+
+
+def test_saved_course_extends_like_the_original(game, tmp_path):
+    course = game.getCourse(seed=2**32 + 5, length=10)
+    path = str(tmp_path / "course.npy")
+    course.save(path)
+
+    loaded = PipeCourse.load(path)
+    assert not loaded.gapY.flags.writeable
+    assert [loaded.gap(k) for k in range(40)] == [course.gap(k) for k in range(40)]
+
+
+def test_shared_course_matches_the_original(game):
+    course = game.getCourse(seed=3, length=20)
+    block, handle = course.share()
+    try:
+        attached = PipeCourse.attach(handle)
+        assert attached.gapY.tolist() == course.gapY.tolist()
+        attached.close()
+    finally:
+        block.close()
+        block.unlink()
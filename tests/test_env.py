@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from flappy_env import FlappyVecEnv
+from agents.neural import NeuralAgent
+
+
+def test_episode_returns_match_main_game_fitness(game, agents):
+    seeds = list(range(100, 100 + len(agents)))
+    env = FlappyVecEnv(game, len(agents), seed=1)
+    batch = NeuralAgent.stack(agents)
+    observations = env.reset(seeds)
+
+    returns = np.zeros(len(agents))
+    episodeReturns = np.full(len(agents), np.nan)
+    episodeScores = np.zeros(len(agents), dtype=int)
+    while np.isnan(episodeReturns).any():
+        jumps = NeuralAgent.predict_jump_batch(
+            batch, observations[:, 0], observations[:, 1], observations[:, 2]
+        )
+        observations, rewards, dones, infos = env.step(jumps)
+        returns += rewards
+        first = dones & np.isnan(episodeReturns)
+        episodeReturns[first] = returns[first]
+        episodeScores[first] = infos["score"][first]
+        returns[dones] = 0
+
+    for agent, seed, episodeReturn, score in zip(
+        agents, seeds, episodeReturns, episodeScores
+    ):
+        crashInfo = game.mainGame(game.movementInfo, [agent], seed=seed)
+        assert episodeReturn == pytest.approx(crashInfo["fitness"][0])
+        assert score == crashInfo["scores"][0]
@@ -0,0 +1,25 @@
+import pytest
+
+from flappy_game import FlappyGame
+
+
+def test_seeded_main_game_is_deterministic(game, agents):
+    first = game.mainGame(game.movementInfo, agents, seed=5)
+    second = game.mainGame(game.movementInfo, agents, seed=5)
+    other = FlappyGame(headless=True, maxFrames=1000)
+    third = other.mainGame(other.movementInfo, agents, seed=5)
+
+    assert first["fitness"] == second["fitness"] == third["fitness"]
+    assert first["scores"] == second["scores"] == third["scores"]
+    assert first["frames"] == second["frames"] == third["frames"]
+
+
+def test_courses_differ_between_seeds(game, agents):
+    first = game.mainGame(game.movementInfo, agents, seed=5)
+    second = game.mainGame(game.movementInfo, agents, seed=6)
+    assert first["fitness"] != second["fitness"]
+
+
+def test_headless_game_refuses_to_render(game, agents):
+    with pytest.raises(ValueError):
+        game.mainGame(game.movementInfo, agents, seed=5, render=True)
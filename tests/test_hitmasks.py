@@ -0,0 +1,34 @@
+import shutil
+
+import numpy as np
+import pygame
+
+from flappy_game import FlappyGame
+
+
+def test_hitmask_cache_is_recomputed_when_a_sprite_changes(tmp_path, monkeypatch):
+    shutil.copytree("assets/sprites", tmp_path / "assets" / "sprites")
+    monkeypatch.chdir(tmp_path)
+    cachePath = str(tmp_path / "hitmasks.npz")
+
+    FlappyGame(headless=True, hitmaskCache=cachePath)
+    with np.load(cachePath) as cache:
+        masks = {name: cache[name] for name in cache.files}
+    # a current cache is trusted as is, even when its masks are wrong
+    blank = {
+        name: np.zeros_like(mask) if mask.dtype == bool else mask
+        for name, mask in masks.items()
+    }
+    np.savez(cachePath, **blank)
+    game = FlappyGame(headless=True, hitmaskCache=cachePath)
+    assert not game.HITMASKS["pipe"][1].any()
+
+    # any sprite changing invalidates it
+    path = "assets/sprites/background-night.png"
+    image = pygame.image.load(path)
+    image.set_at((0, 0), (1, 2, 3, 255))
+    pygame.image.save(image, path)
+    game = FlappyGame(headless=True, hitmaskCache=cachePath)
+    assert game.HITMASKS["pipe"][1].any()
+    with np.load(cachePath) as cache:
+        assert str(cache["digest"]) != str(masks["digest"])
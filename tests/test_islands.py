@@ -0,0 +1,144 @@
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from flappy_islands import (
+    MigrationCoordinator,
+    connect,
+    recvMessage,
+    recvReply,
+    runIsland,
+    sendMessage,
+)
+from agents.neural import NeuralAgent
+
+OPTIONS = {
+    "seed": 0,
+    "agent": "neural",
+    "population": 8,
+    "generations": 2,
+    "elite": 0.25,
+    "mutationRate": 0.1,
+    "maxFrames": 100,
+    "migrateEvery": 1,
+    "migrants": 2,
+}
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = MigrationCoordinator(str(tmp_path / "coordinator.sock"), 2)
+    coordinator.start()
+    yield coordinator
+    coordinator.close()
+
+
+def startIsland(coordinator, island, islands=2, **options):
+    """runs an island in a thread, collecting what it raised in errors"""
+    errors = []
+
+    def run():
+        try:
+            runIsland(coordinator.address, island, islands, {**OPTIONS, **options})
+        except RuntimeError as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, errors
+
+
+def hello(island, **settings):
+    """returns a hello message like the one runIsland sends"""
+    defaults = {
+        "islands": 2,
+        "generations": 2,
+        "migrateEvery": 1,
+        "migrants": 2,
+        "population": 8,
+        "agent": "neural",
+        "genomeSize": NeuralAgent.GENOME_SIZE,
+    }
+    return {"type": "hello", "island": island, "settings": {**defaults, **settings}}
+
+
+def test_messages_survive_a_socket():
+    left, right = socket.socketpair()
+    genomes = np.random.default_rng(0).normal(size=(3, 5))
+    sendMessage(left, {"type": "migrants", "epoch": 4}, genomes)
+    sendMessage(left, {"type": "welcome"})
+
+    header, received = recvMessage(right)
+    assert header == {"type": "migrants", "epoch": 4}
+    np.testing.assert_array_equal(received, genomes)
+    assert recvMessage(right) == ({"type": "welcome"}, None)
+    left.close()
+    right.close()
+
+
+def test_islands_migrate_and_report_their_best(coordinator):
+    threads = [startIsland(coordinator, island) for island in range(2)]
+    results = coordinator.wait(timeout=60)
+    for thread, errors in threads:
+        thread.join(timeout=10)
+        assert not errors
+
+    assert sorted(results) == [0, 1]
+    for fitness, genome in results.values():
+        assert genome.shape == (1, NeuralAgent.GENOME_SIZE)
+    assert sorted(coordinator.migrants) == [1, 2]
+
+
+def test_island_with_other_settings_fails_the_run(coordinator):
+    # the mismatch that used to leave island 1 waiting at a migration forever
+    islands = [
+        startIsland(coordinator, 0, generations=2, migrateEvery=2),
+        startIsland(coordinator, 1, generations=4, migrateEvery=2),
+    ]
+    with pytest.raises(RuntimeError, match="generations"):
+        coordinator.wait(timeout=60)
+    for thread, errors in islands:
+        thread.join(timeout=60)
+        assert not thread.is_alive()
+    assert any(errors for _, errors in islands)
+
+
+def test_island_differing_from_the_first_is_rejected(coordinator):
+    first = connect(coordinator.address)
+    sendMessage(first, hello(0))
+    recvReply(first)
+
+    second = connect(coordinator.address)
+    sendMessage(second, hello(1, migrants=1, population=12))
+    with pytest.raises(RuntimeError, match="migrants, population"):
+        recvReply(second)
+    with pytest.raises(RuntimeError):
+        coordinator.wait(timeout=10)
+
+
+@pytest.mark.parametrize("message", [hello(2), hello(-1), hello(0, islands=3)])
+def test_island_outside_the_ring_is_rejected(coordinator, message):
+    sock = connect(coordinator.address)
+    sendMessage(sock, message)
+    with pytest.raises(RuntimeError):
+        recvReply(sock)
+    with pytest.raises(RuntimeError):
+        coordinator.wait(timeout=10)
+
+
+def test_island_finishing_while_another_waits_fails_the_run(coordinator):
+    waiting, finishing = connect(coordinator.address), connect(coordinator.address)
+    for island, sock in enumerate([waiting, finishing]):
+        sendMessage(sock, hello(island))
+        recvReply(sock)
+
+    genomes = np.zeros((2, NeuralAgent.GENOME_SIZE))
+    sendMessage(waiting, {"type": "migrants", "island": 0, "epoch": 1}, genomes)
+    sendMessage(finishing, {"type": "done", "island": 1, "fitness": 1.0}, genomes[:1])
+
+    with pytest.raises(RuntimeError, match="island 1 finished"):
+        coordinator.wait(timeout=10)
+    with pytest.raises(RuntimeError):
+        recvReply(waiting)
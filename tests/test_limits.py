@@ -0,0 +1,63 @@
+import numpy as np
+
+from agents.base import BaseAgent
+from flappy_game import FlappyGame
+from flappy_sim import PopulationSim
+
+
+class HoverAgent(BaseAgent):
+    """flaps whenever it sank below the gap, clearing the first few pipes"""
+
+    def predict_jump(self, horizontal_dist, vertical_dist):
+        return vertical_dist < -175
+
+    def mutate(self):
+        pass
+
+    @staticmethod
+    def breed(predictorA, predictorB):
+        return HoverAgent()
+
+
+class DiveAgent(HoverAgent):
+    """never flaps, so it hits the ground first"""
+
+    def predict_jump(self, horizontal_dist, vertical_dist):
+        return False
+
+
+def test_max_frames_truncates_the_generation():
+    game = FlappyGame(headless=True, maxFrames=40)
+    crashInfo = game.mainGame(game.movementInfo, [HoverAgent()], seed=0)
+    assert crashInfo["frames"] == 40
+    assert crashInfo["truncated"]
+    assert crashInfo["fitness"] == [40]
+
+
+def test_max_score_ends_the_generation_at_the_first_pipe():
+    game = FlappyGame(headless=True, maxScore=1)
+    crashInfo = game.mainGame(game.movementInfo, [HoverAgent()], seed=0)
+    assert crashInfo["scores"] == [1]
+    assert crashInfo["truncated"]
+
+
+def test_stagnation_frames_end_a_generation_without_deaths():
+    game = FlappyGame(headless=True, stagnationFrames=20)
+    crashInfo = game.mainGame(game.movementInfo, [HoverAgent()] * 3, seed=0)
+    assert crashInfo["frames"] == 20
+    assert crashInfo["truncated"]
+
+
+def test_live_set_shrinks_without_changing_survivor_fitness():
+    game = FlappyGame(headless=True, maxFrames=200)
+    agents = [DiveAgent() if i % 3 else HoverAgent() for i in range(12)]
+    sim = PopulationSim(game, agents, game.movementInfo, seed=0)
+    while not sim.done:
+        sim.step()
+        np.testing.assert_array_equal(sim.live, np.flatnonzero(sim.playerAlive))
+        for _, _, idx in sim.batches:
+            # a batch is re-stacked once fewer than half its birds are alive
+            assert 2 * np.count_nonzero(sim.playerAlive[idx]) >= len(idx)
+
+    hovers = game.mainGame(game.movementInfo, agents[::3], seed=0)
+    assert sim.crashInfo["fitness"][::3] == hovers["fitness"]
@@ -0,0 +1,35 @@
+import numpy as np
+
+from flappy_log import LOG_DTYPE, GenerationLog
+
+
+def test_reopening_drops_a_torn_record(tmp_path):
+    path = str(tmp_path / "run.log")
+    log = GenerationLog(path)
+    for generation in range(3):
+        log.append(generation, 7, [1.0, 2.0, 3.0], bestScore=2, frames=100)
+    # a crash mid write leaves part of a record behind
+    log.file.write(b"\0" * (LOG_DTYPE.itemsize // 2))
+    log.close()
+
+    log = GenerationLog(path)
+    log.append(3, 7, [4.0])
+    log.close()
+    records = GenerationLog.read(path)
+    assert records["generation"].tolist() == [0, 1, 2, 3]
+    assert records["best"].tolist() == [3.0, 3.0, 3.0, 4.0]
+
+
+def test_truncate_drops_the_generations_run_again(tmp_path):
+    path = str(tmp_path / "run.log")
+    log = GenerationLog(path)
+    for generation in range(5):
+        log.append(generation, None, np.arange(10))
+    log.truncate(2)
+    log.append(2, None, np.arange(10))
+    log.close()
+
+    records = GenerationLog.read(path)
+    assert records["generation"].tolist() == [0, 1, 2]
+    assert records["seed"].tolist() == [-1, -1, -1]
+    assert records["median"][0] == 4.5
@@ -0,0 +1,7 @@
+from flappy_parallel import ParallelEvaluator
+
+
+def test_parallel_evaluation_matches_serial(game, agents):
+    serial = game.mainGame(game.movementInfo, agents, seed=9)["fitness"]
+    with ParallelEvaluator(2, maxFrames=game.MAXFRAMES) as evaluator:
+        assert evaluator.evaluate(agents, seed=9) == serial
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from flappy_population import Population
+from agents.neural import NeuralAgent
+from agents.random import RandomAgent
+
+
+def test_evolve_keeps_elites_first_from_best_to_worst():
+    population = Population(NeuralAgent, 20, eliteFraction=0.2, seed=0)
+    fitness = np.arange(20.0)
+    before = population.genomes.copy()
+
+    genomes = population.evolve(fitness)
+
+    assert genomes.shape == (20, NeuralAgent.GENOME_SIZE)
+    assert population.generation == 1
+    np.testing.assert_array_equal(genomes[:4], before[[19, 18, 17, 16]])
+
+
+def test_evolve_is_reproducible_from_a_seed():
+    fitness = np.random.default_rng(1).random(30)
+    first = Population(NeuralAgent, 30, seed=4)
+    second = Population(NeuralAgent, 30, seed=4)
+    for _ in range(3):
+        first.evolve(fitness)
+        second.evolve(fitness)
+    np.testing.assert_array_equal(first.genomes, second.genomes)
+
+
+def test_evolve_rejects_a_fitness_per_other_population():
+    population = Population(NeuralAgent, 10, seed=0)
+    with pytest.raises(ValueError):
+        population.evolve(np.zeros(9))
+
+
+def test_agents_share_the_genome_rows():
+    population = Population(NeuralAgent, 5, seed=0)
+    agents = population.agents()
+    population.genomes[2, 0] = 42.0
+    assert agents[2].genome[0] == 42.0
+
+
+def test_resumed_population_evolves_like_an_uninterrupted_one(tmp_path):
+    fitness = np.random.default_rng(2).random((4, 30))
+    uninterrupted = Population(NeuralAgent, 30, seed=5)
+    for generation in range(4):
+        uninterrupted.evolve(fitness[generation])
+
+    path = str(tmp_path / "checkpoint.npz")
+    population = Population(NeuralAgent, 30, seed=5)
+    for generation in range(2):
+        population.evolve(fitness[generation])
+    population.save(path)
+    resumed = Population.load(path, NeuralAgent)
+    for generation in range(2, 4):
+        resumed.evolve(fitness[generation])
+
+    assert resumed.generation == 4
+    np.testing.assert_array_equal(resumed.genomes, uninterrupted.genomes)
+
+
+def test_load_rejects_another_agent_class(tmp_path):
+    path = str(tmp_path / "checkpoint.npz")
+    Population(NeuralAgent, 10, seed=0).save(path)
+    with pytest.raises(ValueError):
+        Population.load(path, RandomAgent)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from flappy_racing import RaceResult, RacingEvaluator
+
+
+def test_fitness_ranks_courses_survived_before_mean():
+    result = RaceResult(
+        mean=np.array([90.0, 10.0, 50.0, 20.0]),
+        stderr=np.zeros(4),
+        courses=np.array([2, 4, 4, 3]),
+    )
+    # the early loser with the best mean still ranks below every finalist
+    assert np.argsort(result.fitness).tolist() == [0, 3, 1, 2]
+    assert result.best() == 2
+
+
+def test_survivors_keep_the_best_and_the_not_clearly_worse():
+    racer = RacingEvaluator(None, keepFraction=0.25, z=2.0)
+    contenders = np.arange(4)
+    courses = np.full(4, 4)
+    total = np.array([400.0, 100.0, 360.0, 40.0])
+    # agent 2 varies a lot, agent 1 not at all
+    totalSq = np.array([40000.0, 2500.0, 72000.0, 400.0])
+
+    survivors = racer.survivors(contenders, total, totalSq, courses)
+    assert survivors.tolist() == [0, 2]
+
+
+def test_race_stops_flying_dropped_agents():
+    flown = []
+
+    def evaluate(agents, seed):
+        flown.append(len(agents))
+        return [float(agent) for agent in agents]
+
+    racer = RacingEvaluator(evaluate, keepFraction=0.5, minCourses=2)
+    result = racer.race(list(range(8)), seeds=range(5))
+
+    # the race ends once a single agent is left
+    assert flown == [8, 8, 4, 2]
+    assert result.courses.tolist() == [2, 2, 2, 2, 3, 3, 4, 4]
+    assert result.best() == 7
@@ -0,0 +1,16 @@
+from flappy_replay import Replay
+
+
+def test_saved_replay_reproduces_fitness(game, agents, tmp_path):
+    crashInfo = game.mainGame(game.movementInfo, agents, seed=7, record=True)
+    path = str(tmp_path / "replay.npz")
+    crashInfo["replay"].save(path)
+    replay = Replay.load(path)
+
+    replayed = game.replay(replay)
+    assert replayed["fitness"] == crashInfo["fitness"]
+    assert replayed["scores"] == crashInfo["scores"]
+
+    best = replay.best(3)
+    replayed = game.replay(replay, best)
+    assert replayed["fitness"] == [crashInfo["fitness"][i] for i in best]
@@ -0,0 +1,34 @@
+import pytest
+
+from flappy_snapshot import SnapshotLibrary
+
+
+def test_restored_snapshot_continues_the_recorded_flight(game, agents):
+    crashInfo = game.mainGame(game.movementInfo, agents, seed=11, record=True)
+    replay = crashInfo["replay"]
+
+    for bird in replay.best(5):
+        frame = int(replay.endFrames[bird]) // 2
+        snapshot = game.snapshotReplay(replay, bird, frame)
+        restored = game.mainGame(game.movementInfo, [agents[bird]], snapshot=snapshot)
+        # fitness counts the frames flown from the snapshot on
+        assert restored["fitness"][0] == pytest.approx(
+            crashInfo["fitness"][bird] - frame
+        )
+        assert restored["scores"][0] == crashInfo["scores"][bird]
+
+
+def test_library_survives_a_save_and_load(game, agents, tmp_path):
+    crashInfo = game.mainGame(game.movementInfo, agents, seed=11, record=True)
+    replay = crashInfo["replay"]
+    library = SnapshotLibrary()
+    for bird in replay.best(3):
+        library.add(game.snapshotReplay(replay, bird, 10))
+
+    path = str(tmp_path / "library.pkl")
+    library.save(path)
+    loaded = SnapshotLibrary.load(path)
+    assert len(loaded) == 3
+    for original, copy in zip(library.snapshots, loaded.snapshots):
+        assert vars(copy) == vars(original)
+    assert loaded.pick(4, every=2) is loaded.snapshots[2]